@@ -1,23 +1,26 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent
+from llm_provider import get_llm
 import json
 import re
 
 class AuraAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['aura']['role'],
             goal=AGENT_CONFIG['aura']['goal'],
             backstory=AGENT_CONFIG['aura']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'aura', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['audio_agent'], temperature=0.7)
+        return get_llm(MODELS['audio_agent'], temperature=0.7)
 
     def design_soundscape(self, context: str, mood: str) -> dict:
         prompt = dedent(f"""
@@ -1,59 +1,90 @@
 from crewai import Agent
 from textwrap import dedent
-from config import MODELS, AGENT_CONFIG
-import os
-import re
+from config import MODELS, AGENT_CONFIG, CODE_WEAVER_STREAMING
+from artifact_store import get_artifact_store
+from code_blocks import PYTHON_LANGUAGES, FencedBlockParser, extension_for, extract_code_blocks
+from events import publish_task_event
+from llm_cache import cached_agent, stream_agent_task
+from llm_provider import get_llm
 
 class CodeWeaverAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['code_weaver']['role'],
             goal=AGENT_CONFIG['code_weaver']['goal'],
             backstory=AGENT_CONFIG['code_weaver']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
-        self.workspace_dir = "workspace"
+        self.agent = cached_agent(agent, 'code_weaver', self.llm)
+        self.artifacts = get_artifact_store()
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['code_agent'], temperature=0.1)
+        return get_llm(MODELS['code_agent'], temperature=0.1)
 
-    def _ensure_workspace(self):
-        if not os.path.exists(self.workspace_dir):
-            os.makedirs(self.workspace_dir)
+    def _filename_for(self, code: str, index: int, language: str = "") -> str:
+        # Only Python blocks get a .py name; others are named by their fence
+        # language so they are not syntax-checked as Python.
+        if language in PYTHON_LANGUAGES:
+            if "def " in code and "class " in code:
+                return "app.py"
+            if "pytest" in code:
+                return "test_app.py"
+        elif language in ("dockerfile", "docker") or (not language and "FROM" in code and "RUN" in code):
+            return "Dockerfile"
+        elif language in ("", "text", "txt") and "requirements" in code.lower():
+            return "requirements.txt"
+        return f"generated_code_{index}.{extension_for(language)}"
 
     def _extract_code_blocks(self, text: str) -> dict:
+        # filename -> (language, code)
         code_blocks = {}
-        pattern = r"```(?:\w+)?\s*\n([\s\S]*?)```"
-        matches = re.findall(pattern, text)
-        
-        for i, match in enumerate(matches):
-            filename = f"generated_code_{i}.py"
-            if "def " in match and "class " in match:
-                filename = "app.py"
-            elif "FROM" in match and "RUN" in match:
-                filename = "Dockerfile"
-            elif "pytest" in match:
-                filename = "test_app.py"
-            elif "requirements" in match.lower():
-                filename = "requirements.txt"
-                
-            code_blocks[filename] = match.strip()
-            
+        for i, (language, code) in enumerate(extract_code_blocks(text)):
+            code_blocks[self._filename_for(code, i, language)] = (language, code.strip())
         return code_blocks
 
     def _save_code(self, code_blocks: dict):
-        for filename, code in code_blocks.items():
-            filepath = os.path.join(self.workspace_dir, filename)
-            with open(filepath, 'w') as f:
-                f.write(code)
-            print(f"[CodeWeaver] Saved code to {filepath}")
+        # Files go to the current project's workspace through the artifact
+        # store. Identical content keeps its mtime, so Q-Arc's cached test
+        # results for it stay valid.
+        for filename, (_, code) in code_blocks.items():
+            artifact = self.artifacts.write(filename, code)
+            if artifact['changed']:
+                print(f"[CodeWeaver] Saved code to {artifact['path']}")
+            else:
+                print(f"[CodeWeaver] {artifact['path']} unchanged")
+
+    def _write_code_streaming(self, prompt: str) -> dict:
+        parser = FencedBlockParser()
+        chunks = []
+        files = []
+        languages = {}
+        for chunk in stream_agent_task(self.agent, self.llm, prompt):
+            chunks.append(chunk)
+            blocks = parser.feed(chunk)
+            first_index = parser.count - len(blocks)
+            for index, (language, code) in enumerate(blocks, first_index):
+                filename = self._filename_for(code, index, language)
+                code = code.strip()
+                self._save_code({filename: (language, code)})
+                if filename not in files:
+                    files.append(filename)
+                languages[filename] = language
+                publish_task_event("file_written", {
+                    "file": filename,
+                    "index": index,
+                    "bytes": len(code.encode())
+                })
+
+        return {
+            "response": "".join(chunks),
+            "files": files,
+            "languages": languages
+        }
 
     def write_code(self, task_description: str, context: str = "") -> dict:
-        self._ensure_workspace()
-        
         prompt = dedent(f"""
         **Task Description:**
         {task_description}
@@ -73,6 +104,9 @@ class CodeWeaverAgent:
         """)
         
         print(f"[CodeWeaver] Executing task: {task_description}")
+        if CODE_WEAVER_STREAMING:
+            return self._write_code_streaming(prompt)
+
         response = self.agent.execute_task(task=prompt)
         
         code_blocks = self._extract_code_blocks(response)
@@ -82,5 +116,6 @@ class CodeWeaverAgent:
             
         return {
             "response": response,
-            "files": list(code_blocks.keys())
+            "files": list(code_blocks.keys()),
+            "languages": {filename: language for filename, (language, _) in code_blocks.items()}
         }
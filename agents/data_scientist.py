@@ -1,12 +1,15 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent
+from llm_provider import get_llm
 import json
 import re
 
 class DataScientistAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role="Data Scientist & ML Engineer",
             goal="Analyze data, build machine learning models, and extract insights.",
             backstory=dedent("""
@@ -16,12 +19,12 @@ class DataScientistAgent:
             """),
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'data_scientist', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['architect'], temperature=0.1)
+        return get_llm(MODELS['architect'], temperature=0.1)
 
     def analyze_data(self, data_description: str, objectives: str) -> dict:
         prompt = dedent(f"""
@@ -1,23 +1,26 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent
+from llm_provider import get_llm
 import re
 import json
 
 class LogicSphereAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['logic_sphere']['role'],
             goal=AGENT_CONFIG['logic_sphere']['goal'],
             backstory=AGENT_CONFIG['logic_sphere']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'logic_sphere', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['logic_agent'], temperature=0.1)
+        return get_llm(MODELS['logic_agent'], temperature=0.1)
 
     def design_algorithm(self, problem_description: str, constraints: str = "") -> dict:
         prompt = dedent(f"""
@@ -1,24 +1,27 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent
+from llm_provider import get_llm
 import json
 import re
 import os
 
 class PixelGeniusAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['pixel_genius']['role'],
             goal=AGENT_CONFIG['pixel_genius']['goal'],
             backstory=AGENT_CONFIG['pixel_genius']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'pixel_genius', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['design_agent'], temperature=0.7)
+        return get_llm(MODELS['design_agent'], temperature=0.7)
 
     def design_ui(self, requirements: str, platform: str = "web") -> dict:
         prompt = dedent(f"""
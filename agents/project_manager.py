@@ -1,25 +1,28 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent, stream_agent_task
+from llm_provider import get_llm
 import os
 
 class ProjectManagerAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['project_synapse']['role'],
             goal=AGENT_CONFIG['project_synapse']['goal'],
             backstory=AGENT_CONFIG['project_synapse']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'project_synapse', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['planner'], temperature=0.1)
+        return get_llm(MODELS['planner'], temperature=0.1)
 
-    def create_plan(self, objective: str) -> str:
-        prompt = dedent(f"""
+    def _plan_prompt(self, objective: str) -> str:
+        return dedent(f"""
         **Objective:** {objective}
 
         **Your Task:**
@@ -48,4 +51,9 @@ class ProjectManagerAgent:
         Be extremely specific and technical in the task descriptions.
         Consider dependencies between tasks.
         """)
-        return self.agent.execute_task(task=prompt)
+
+    def create_plan(self, objective: str) -> str:
+        return self.agent.execute_task(task=self._plan_prompt(objective))
+
+    def stream_plan(self, objective: str):
+        return stream_agent_task(self.agent, self.llm, self._plan_prompt(objective))
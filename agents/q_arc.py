@@ -1,57 +1,39 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
-import subprocess
+from artifact_store import get_artifact_store
+from llm_cache import cached_agent
+from llm_provider import get_llm
+from pytest_worker import get_pytest_worker, get_result_cache
 import os
 import re
 
 class QArcAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['q_arc']['role'],
             goal=AGENT_CONFIG['q_arc']['goal'],
             backstory=AGENT_CONFIG['q_arc']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
-        self.workspace_dir = "workspace"
+        self.agent = cached_agent(agent, 'q_arc', self.llm)
+        self.artifacts = get_artifact_store()
 
-    def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['qa_agent'], temperature=0.1)
+    @property
+    def workspace_dir(self) -> str:
+        # The running task's project workspace.
+        return self.artifacts.workspace_dir()
 
-    def _run_command(self, command, cwd=None):
-        if cwd is None:
-            cwd = self.workspace_dir
-            
-        try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                cwd=cwd
-            )
-            return {
-                "success": result.returncode == 0,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "returncode": result.returncode
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
+    def _get_llm(self):
+        return get_llm(MODELS['qa_agent'], temperature=0.1)
 
     def write_tests(self, code_file: str, functionality: str) -> dict:
-        code_path = os.path.join(self.workspace_dir, code_file)
-        if not os.path.exists(code_path):
+        code_content = self._read_artifact(code_file)
+        if code_content is None:
             return {"error": f"File {code_file} not found in workspace"}
-            
-        with open(code_path, 'r') as f:
-            code_content = f.read()
         
         prompt = dedent(f"""
         **Code to Test:**
@@ -80,9 +62,12 @@ class QArcAgent:
         
         if code_blocks:
             test_filename = f"test_{code_file}"
-            with open(os.path.join(self.workspace_dir, test_filename), 'w') as f:
-                f.write(list(code_blocks.values())[0])
-            print(f"[Q-Arc] Saved tests to {test_filename}")
+            test_code = list(code_blocks.values())[0]
+            # An identical file is left untouched so cached results stay valid.
+            if self.artifacts.write(test_filename, test_code, kind="test")['changed']:
+                print(f"[Q-Arc] Saved tests to {test_filename}")
+            else:
+                print(f"[Q-Arc] Tests in {test_filename} unchanged")
             
             return {
                 "response": response,
@@ -91,28 +76,58 @@ class QArcAgent:
         else:
             return {"error": "No test code found in response"}
 
+    def _read_artifact(self, name: str) -> str:
+        content = self.artifacts.read(name)
+        return content.decode('utf-8', errors='replace') if content is not None else None
+
     def run_tests(self, test_file: str) -> dict:
-        if not os.path.exists(os.path.join(self.workspace_dir, test_file)):
+        workspace_dir = self.workspace_dir
+        if not os.path.exists(os.path.join(workspace_dir, test_file)):
             return {"error": f"Test file {test_file} not found"}
             
-        print(f"[Q-Arc] Running tests from {test_file}")
+        cache = get_result_cache()
+        cache_key = cache.key(workspace_dir, [test_file]) if cache else None
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print(f"[Q-Arc] Workspace unchanged, reusing results for {test_file}")
+                cached['cached'] = True
+                return cached
         
-        self._run_command("pip install pytest")
+        print(f"[Q-Arc] Running tests from {test_file}")
         
-        result = self._run_command(f"python -m pytest {test_file} -v")
+        try:
+            # Each project has its own warm worker, so concurrent projects
+            # do not queue behind one another.
+            report = get_pytest_worker(workspace_dir).run([test_file])
+        except RuntimeError as e:
+            return {"error": str(e)}
+        if 'error' in report:
+            return {"success": False, "error": report['error'], "status": "FAIL"}
+        
+        result = {
+            "success": report['exit_code'] == 0,
+            "stdout": report['output'],
+            "stderr": "",
+            "returncode": report['exit_code'],
+            "tests": report['tests'],
+            "summary": report['summary'],
+            "slowest_tests": report['slowest'],
+            "timed_out": report['timed_out'],
+            "duration": report['duration'],
+            "status": "PASS" if report['exit_code'] == 0 else "FAIL"
+        }
         
-        if result['success']:
-            status = "PASS"
-        else:
-            status = "FAIL"
-            
-            failure_pattern = r'FAILED.*\.py::.*::.* - (.*)'
-            failures = re.findall(failure_pattern, result['stdout'] + result['stderr'])
-            
-            if failures:
-                result['failures'] = failures
+        failures = [f"{test['nodeid']}: {test['message']}" for test in report['tests']
+                    if test['outcome'] in ('failed', 'error', 'timeout')]
+        failures.extend(f"{error['nodeid'] or test_file}: collection error" for error in report['collection_errors'])
+        if failures:
+            result['failures'] = failures
         
-        result['status'] = status
+        # Timeouts depend on how loaded the machine was, not only on the
+        # code, so those results are not cached.
+        if cache_key and not report['timed_out'] and not report['summary']['timeout']:
+            cache.put(cache_key, result)
         return result
 
     def _extract_code_blocks(self, text: str) -> dict:
@@ -126,12 +141,9 @@ class QArcAgent:
         return code_blocks
 
     def perform_code_review(self, code_file: str) -> dict:
-        code_path = os.path.join(self.workspace_dir, code_file)
-        if not os.path.exists(code_path):
+        code_content = self._read_artifact(code_file)
+        if code_content is None:
             return {"error": f"File {code_file} not found in workspace"}
-            
-        with open(code_path, 'r') as f:
-            code_content = f.read()
         
         prompt = dedent(f"""
         **Code to Review:**
@@ -149,12 +161,34 @@ class QArcAgent:
         - Documentation completeness
         
         Provide a detailed review with specific suggestions for improvement.
+
+        Finish with a verdict on its own line: `VERDICT: PASS` if the code can
+        ship as it is, or `VERDICT: FAIL` followed by a bulleted list of the
+        blocking issues only.
         """)
         
         print(f"[Q-Arc] Reviewing code in {code_file}")
         response = self.agent.execute_task(task=prompt)
         
-        return {
+        result = {
             "response": response,
             "code_file": code_file
         }
+        result.update(self._parse_verdict(response))
+        return result
+
+    def _parse_verdict(self, response: str) -> dict:
+        matches = list(re.finditer(r'VERDICT:\s*(PASS|FAIL)', response, re.IGNORECASE))
+        if not matches:
+            return {}
+
+        verdict = matches[-1]
+        blocking_issues = []
+        for line in response[verdict.end():].splitlines():
+            item = re.match(r'\s*[-*]\s+(.*\S)', line)
+            if item:
+                blocking_issues.append(item.group(1))
+        return {
+            "verdict": verdict.group(1).upper(),
+            "blocking_issues": blocking_issues
+        }
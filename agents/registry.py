@@ -0,0 +1,60 @@
+import importlib
+import threading
+
+# Agent name as used in plans -> (module, class). Modules are imported on
+# first use so crewai/langchain are only loaded when an agent is needed.
+AGENT_CLASSES = {
+    'ProjectManager': ('agents.project_manager', 'ProjectManagerAgent'),
+    'CodeWeaver': ('agents.code_weaver', 'CodeWeaverAgent'),
+    'LogicSphere': ('agents.logic_sphere', 'LogicSphereAgent'),
+    'Q-Arc': ('agents.q_arc', 'QArcAgent'),
+    'PixelGenius': ('agents.pixel_genius', 'PixelGeniusAgent'),
+    'ScriptSensei': ('agents.script_sensei', 'ScriptSenseiAgent'),
+    'Aura': ('agents.aura', 'AuraAgent'),
+    'DataScientist': ('agents.data_scientist', 'DataScientistAgent'),
+    'BlockchainDeveloper': ('agents.blockchain_developer', 'BlockchainDeveloperAgent'),
+    'DevOpsEngineer': ('agents.devops_engineer', 'DevOpsEngineerAgent'),
+}
+
+
+class AgentRegistry:
+    def __init__(self, agent_classes=None):
+        self._agent_classes = dict(agent_classes or AGENT_CLASSES)
+        self._instances = {}
+        self._locks = {name: threading.Lock() for name in self._agent_classes}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._agent_classes
+
+    def names(self):
+        return list(self._agent_classes)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def loaded(self):
+        return [name for name in self._agent_classes if name in self._instances]
+
+    def get(self, name: str):
+        agent = self._instances.get(name)
+        if agent is not None:
+            return agent
+
+        if name not in self._agent_classes:
+            raise KeyError(f"Unknown agent: {name}")
+
+        # Per-agent lock: concurrent tasks for different agents can build
+        # their agents in parallel, same-agent callers wait for one instance.
+        with self._locks[name]:
+            agent = self._instances.get(name)
+            if agent is None:
+                module_name, class_name = self._agent_classes[name]
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                print(f"[Nexus Prime] Initializing agent {name}")
+                agent = agent_class()
+                self._instances[name] = agent
+        return agent
+
+    def preload(self, names=None):
+        for name in names or self._agent_classes:
+            self.get(name)
@@ -1,23 +1,26 @@
 from crewai import Agent
 from textwrap import dedent
 from config import MODELS, AGENT_CONFIG
+from llm_cache import cached_agent
+from llm_provider import get_llm
 import json
 import re
 
 class ScriptSenseiAgent:
     def __init__(self):
-        self.agent = Agent(
+        self.llm = self._get_llm()
+        agent = Agent(
             role=AGENT_CONFIG['script_sensei']['role'],
             goal=AGENT_CONFIG['script_sensei']['goal'],
             backstory=AGENT_CONFIG['script_sensei']['backstory'],
             verbose=True,
             allow_delegation=False,
-            llm=self._get_llm(),
+            llm=self.llm,
         )
+        self.agent = cached_agent(agent, 'script_sensei', self.llm)
 
     def _get_llm(self):
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(model_name=MODELS['content_agent'], temperature=0.8)
+        return get_llm(MODELS['content_agent'], temperature=0.8)
 
     def create_content(self, topic: str, format: str, tone: str = "professional") -> str:
         prompt = dedent(f"""
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from events import current_task
+
+DEFAULT_PROJECT = "default"
+
+_TEST_PREFIXES = ("test_",)
+_TEST_SUFFIXES = ("_test.py", ".test.js", ".spec.js", ".test.ts", ".spec.ts")
+_CSS_SUFFIXES = (".css", ".scss", ".sass", ".less")
+_IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp")
+_CONFIG_SUFFIXES = (".txt", ".json", ".yml", ".yaml", ".toml", ".ini", ".cfg", ".env")
+_CONFIG_NAMES = ("Dockerfile", "Makefile", "Procfile")
+
+
+def kind_for(name: str) -> str:
+    base = os.path.basename(name)
+    lower = base.lower()
+    if lower.startswith(_TEST_PREFIXES) or lower.endswith(_TEST_SUFFIXES):
+        return "test"
+    if lower.endswith(_CSS_SUFFIXES):
+        return "css"
+    if lower.endswith(_IMAGE_SUFFIXES):
+        return "image"
+    if base in _CONFIG_NAMES or lower.endswith(_CONFIG_SUFFIXES):
+        return "config"
+    return "code"
+
+
+class ProjectManifest:
+    # Logical file name -> versions (oldest first), each with its blob digest
+    # and producing task. The indexes are rebuilt from the versions on load
+    # and kept up to date on every write, so no lookup walks the history.
+    def __init__(self, project_id: str, files: Dict[str, List[Dict]] = None, seq: int = 0):
+        self.project_id = project_id
+        self.files = files or {}
+        self.seq = seq
+        self.by_task: Dict[str, List[str]] = {}
+        self.by_kind: Dict[str, Dict[str, None]] = {}
+        self._task_kind: Dict[tuple, List[str]] = {}
+        self._latest_task: Dict[str, str] = {}
+        versions = sorted((v for history in self.files.values() for v in history), key=lambda v: v["seq"])
+        for version in versions:
+            self._index(version)
+
+    @staticmethod
+    def _task_key(task_id) -> str:
+        return None if task_id is None else str(task_id)
+
+    def _index(self, version: Dict):
+        name, kind, task = version["name"], version["kind"], self._task_key(version["task_id"])
+        names = self.by_task.setdefault(task, [])
+        if name not in names:
+            names.append(name)
+        kinds = self.by_kind.setdefault(kind, {})
+        kinds.pop(name, None)
+        kinds[name] = None
+        written = self._task_kind.setdefault((task, kind), [])
+        if name not in written:
+            written.append(name)
+        self._latest_task[kind] = task
+
+    def latest_version(self, name: str) -> Dict:
+        history = self.files.get(name)
+        return history[-1] if history else None
+
+    def add(self, version: Dict, max_versions: int) -> List[Dict]:
+        # Returns the versions dropped to stay within max_versions.
+        self.seq += 1
+        version["seq"] = self.seq
+        history = self.files.setdefault(version["name"], [])
+        history.append(version)
+        self._index(version)
+        if max_versions and len(history) > max_versions:
+            dropped = history[:len(history) - max_versions]
+            del history[:len(history) - max_versions]
+            return dropped
+        return []
+
+    def latest(self, kind: str) -> str:
+        # First file of this kind written by the most recent task to write
+        # one, e.g. the main module of the latest CodeWeaver task.
+        if kind not in self._latest_task:
+            return None
+        names = self._task_kind.get((self._latest_task[kind], kind))
+        return names[0] if names else None
+
+    def to_dict(self) -> Dict:
+        return {"project_id": self.project_id, "seq": self.seq, "files": self.files}
+
+
+class ArtifactStore:
+    # Blobs are stored once per content hash and shared by every project and
+    # attempt; each project has a JSON manifest and a working directory under
+    # workspace_root holding the latest version of each file. Only the last
+    # max_versions versions of a file are kept. Several processes may share
+    # one store: writes and garbage collection hold a lock file, and blobs
+    # are only deleted after checking every manifest on disk.
+    def __init__(self, path: str, workspace_root: str = "workspace", max_versions: int = 10):
+        self.path = path
+        self.workspace_root = workspace_root
+        self.max_versions = max_versions
+        self._blob_dir = os.path.join(path, "blobs")
+        self._manifest_dir = os.path.join(path, "manifests")
+        self._lock_path = os.path.join(path, ".lock")
+        self._manifests: Dict[str, ProjectManifest] = {}
+        self._manifest_stamps: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._manifest_dir, exist_ok=True)
+
+    def _context(self, project_id: str, task_id=None):
+        context = current_task.get()
+        if project_id is None:
+            project_id = context[0] if context else DEFAULT_PROJECT
+        # Project ids become directory and file names.
+        if not project_id or project_id in (".", "..") or os.path.basename(project_id) != project_id:
+            raise ValueError(f"Invalid project id: {project_id!r}")
+        if task_id is None and context and context[0] == project_id:
+            task_id = context[1]
+        return project_id, task_id
+
+    def workspace_path(self, project_id: str = None) -> str:
+        # Resolves and validates only; nothing is created.
+        project_id, _ = self._context(project_id)
+        return os.path.join(self.workspace_root, project_id)
+
+    def workspace_dir(self, project_id: str = None) -> str:
+        path = self.workspace_path(project_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _manifest_path(self, project_id: str) -> str:
+        return os.path.join(self._manifest_dir, f"{project_id}.json")
+
+    @contextmanager
+    def _locked(self):
+        # Thread lock plus an exclusive lock file shared with other processes.
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _manifest(self, project_id: str) -> ProjectManifest:
+        # Cached per process, but reloaded when another process has
+        # rewritten the file.
+        path = self._manifest_path(project_id)
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            stamp = None
+        manifest = self._manifests.get(project_id)
+        if manifest is None or self._manifest_stamps.get(project_id) != stamp:
+            manifest = ProjectManifest(project_id)
+            if stamp is not None:
+                try:
+                    with open(path, 'r') as f:
+                        data = json.load(f)
+                    manifest = ProjectManifest(project_id, data.get("files"), data.get("seq", 0))
+                except (OSError, ValueError):
+                    pass
+            self._manifests[project_id] = manifest
+            self._manifest_stamps[project_id] = stamp
+        return manifest
+
+    def _save_manifest(self, manifest: ProjectManifest):
+        path = self._manifest_path(manifest.project_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest.to_dict(), f)
+        os.replace(temp_path, path)
+        stat = os.stat(path)
+        self._manifest_stamps[manifest.project_id] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _referenced(self, digests: set) -> set:
+        # Mark phase: which of these digests any manifest on disk still uses.
+        found = set()
+        for name in os.listdir(self._manifest_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self._manifest_dir, name), 'r') as f:
+                    files = json.load(f).get("files") or {}
+            except (OSError, ValueError):
+                # An unreadable manifest might refer to anything.
+                return set(digests)
+            for history in files.values():
+                for version in history:
+                    if version["digest"] in digests:
+                        found.add(version["digest"])
+            if found == digests:
+                break
+        return found
+
+    def _sweep(self, digests: set):
+        # Called with the store locked, after the manifest is saved.
+        for digest in digests - self._referenced(digests):
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _write_file(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _copy_file(self, source: str, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, path)
+
+    def write(self, name: str, content: Union[str, bytes], kind: str = None, project_id: str = None,
+              task_id=None) -> Dict:
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        return self._commit(name, digest, len(data), lambda path: self._write_file(path, data),
+                            kind, project_id, task_id)
+
+    def write_file(self, name: str, source_path: str, kind: str = None, project_id: str = None,
+                   task_id=None) -> Dict:
+        # Like write(), for content already on disk (e.g. generated images);
+        # it is hashed and copied in chunks rather than read into memory.
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        size = os.path.getsize(source_path)
+        return self._commit(name, digest.hexdigest(), size, lambda path: self._copy_file(source_path, path),
+                            kind, project_id, task_id)
+
+    def _commit(self, name: str, digest: str, size: int, materialize, kind: str, project_id: str,
+                task_id) -> Dict:
+        project_id, task_id = self._context(project_id, task_id)
+        workspace_path = os.path.join(self.workspace_dir(project_id), name)
+
+        with self._locked():
+            manifest = self._manifest(project_id)
+            current = manifest.latest_version(name)
+            if (current and current["digest"] == digest and current["task_id"] == task_id
+                    and os.path.exists(workspace_path)):
+                # Same content from the same task, e.g. a retried attempt:
+                # nothing to record, and the file keeps its mtime.
+                return dict(current, path=workspace_path, changed=False)
+
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                materialize(blob_path)
+            version = {
+                "name": name,
+                "kind": kind or kind_for(name),
+                "digest": digest,
+                "size": size,
+                "task_id": task_id,
+                "created_at": time.time()
+            }
+            dropped = {old["digest"] for old in manifest.add(version, self.max_versions)}
+            self._save_manifest(manifest)
+            if dropped:
+                self._sweep(dropped)
+
+            changed = not (current and current["digest"] == digest and os.path.exists(workspace_path))
+            if changed:
+                self._copy_file(blob_path, workspace_path)
+            return dict(version, path=workspace_path, changed=changed)
+
+    def read(self, name: str, project_id: str = None, version: int = None) -> bytes:
+        # None if the file, that version, or its blob no longer exists.
+        project_id, _ = self._context(project_id)
+        with self._lock:
+            history = self._manifest(project_id).files.get(name) or []
+            entry = history[-1] if version is None else next((v for v in history if v["seq"] == version), None)
+        if entry is None:
+            return None
+        try:
+            with open(self._blob_path(entry["digest"]), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def latest(self, kind: str, project_id: str = None) -> str:
+        project_id, _ = self._context(project_id)
+        with self._lock:
+            return self._manifest(project_id).latest(kind)
+
+    def files_for_task(self, task_id, project_id: str = None) -> List[str]:
+        project_id, _ = self._context(project_id)
+        with self._lock:
+            return list(self._manifest(project_id).by_task.get(ProjectManifest._task_key(task_id), []))
+
+    def files_of_kind(self, kind: str, project_id: str = None) -> List[str]:
+        # Least recently written first.
+        project_id, _ = self._context(project_id)
+        with self._lock:
+            return list(self._manifest(project_id).by_kind.get(kind, {}))
+
+    def history(self, name: str, project_id: str = None) -> List[Dict]:
+        project_id, _ = self._context(project_id)
+        with self._lock:
+            return [dict(v) for v in self._manifest(project_id).files.get(name, [])]
+
+    def stats(self) -> Dict:
+        blobs = sum(len(files) for _, _, files in os.walk(self._blob_dir))
+        with self._lock:
+            return {"blobs": blobs, "projects_loaded": len(self._manifests)}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    from config import ARTIFACTS
+
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore(ARTIFACTS["path"], ARTIFACTS["workspace_root"], ARTIFACTS["max_versions"])
+        return _default_store
@@ -0,0 +1,89 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytest_worker import PytestWorker
+
+APP_CODE = """
+def add(a, b):
+    return a + b
+
+
+def divide(a, b):
+    if b == 0:
+        raise ValueError("division by zero")
+    return a / b
+"""
+
+TEST_CODE = """
+import pytest
+from app import add, divide
+
+
+@pytest.mark.parametrize("a, b, expected", [(1, 2, 3), (-1, 1, 0), (0, 0, 0)])
+def test_add(a, b, expected):
+    assert add(a, b) == expected
+
+
+def test_divide():
+    assert divide(6, 3) == 2
+
+
+def test_divide_by_zero():
+    with pytest.raises(ValueError):
+        divide(1, 0)
+"""
+
+
+def run_legacy(workspace: str, with_pip: bool):
+    # What QArcAgent.run_tests used to do on every call.
+    if with_pip:
+        subprocess.run("pip install pytest", shell=True, capture_output=True, text=True, cwd=workspace)
+    subprocess.run("python -m pytest test_app.py -v", shell=True, capture_output=True, text=True, cwd=workspace)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def report(name: str, timings):
+    print(f"{name:>22}: median {statistics.median(timings) * 1000:8.1f} ms"
+          f"  min {min(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the warm pytest worker with a subprocess per run")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-pip", action="store_true", help="leave pip install out of the legacy path")
+    args = parser.parse_args()
+
+    workspace = tempfile.mkdtemp(prefix="nexus-bench-")
+    try:
+        with open(os.path.join(workspace, "app.py"), "w") as f:
+            f.write(APP_CODE)
+        with open(os.path.join(workspace, "test_app.py"), "w") as f:
+            f.write(TEST_CODE)
+
+        report("legacy subprocess", [timed(run_legacy, workspace, not args.skip_pip) for _ in range(args.runs)])
+
+        worker = PytestWorker(workspace)
+        try:
+            report("worker first run", [timed(worker.run, ["test_app.py"])])
+            report("worker warm run", [timed(worker.run, ["test_app.py"]) for _ in range(args.runs)])
+        finally:
+            worker.close()
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Each snippet runs in a fresh interpreter so module caches do not carry over.
+SNIPPETS = {
+    "import": """
+import time
+start = time.perf_counter()
+import nexus_core
+print(time.perf_counter() - start)
+""",
+    "construct": """
+import time
+start = time.perf_counter()
+from nexus_core import NexusCore
+NexusCore()
+print(time.perf_counter() - start)
+""",
+    "first_agent": """
+import time
+start = time.perf_counter()
+from nexus_core import NexusCore
+nexus = NexusCore()
+nexus.agents.get('CodeWeaver')
+print(time.perf_counter() - start)
+""",
+    "eager_all_agents": """
+import time
+start = time.perf_counter()
+from nexus_core import NexusCore
+nexus = NexusCore()
+nexus.agents.preload()
+print(time.perf_counter() - start)
+""",
+}
+
+
+def run_snippet(code: str) -> float:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure NexusCore cold start and first-agent latency")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in SNIPPETS.items():
+        try:
+            timings = [run_snippet(code) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:>18}: failed ({str(e).splitlines()[-1]})")
+            continue
+        print(f"{name:>18}: median {statistics.median(timings) * 1000:8.1f} ms"
+              f"  min {min(timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from state_manager import ProjectStateManager
+from sqlite_state import SQLiteStateManager
+
+
+def build_state(task_count: int) -> dict:
+    tasks = [
+        {"id": i, "description": f"Task {i}", "agent": "CodeWeaver", "dependencies": [i - 1] if i > 1 else []}
+        for i in range(1, task_count + 1)
+    ]
+    return {
+        "active_plan": {
+            "project_name": f"Benchmark {task_count}",
+            "objective": "Benchmark state persistence",
+            "phases": [{"name": "Build", "description": "All tasks", "tasks": tasks}]
+        },
+        "workspace_state": {},
+        "task_status": {
+            task["id"]: {"status": "pending", "dependencies": task["dependencies"], "dependencies_met": False}
+            for task in tasks
+        }
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_backend(name: str, manager, task_count: int, updates: int):
+    state = build_state(task_count)
+    project_id = f"bench{task_count}"
+    result = "x" * 2048
+
+    save_seconds = timed(manager.save_project, project_id, state)
+
+    start = time.perf_counter()
+    for i in range(1, updates + 1):
+        task_id = (i % task_count) + 1
+        manager.append_events(project_id, [
+            {"op": "workspace", "key": f"task_{task_id}", "value": {"response": result}},
+            {"op": "task_status", "task_id": task_id,
+             "status": {"status": "completed", "dependencies": [], "dependencies_met": True}}
+        ])
+    update_seconds = time.perf_counter() - start
+
+    load_seconds = timed(manager.load_project, project_id)
+    list_seconds = timed(manager.list_projects)
+
+    print(f"{name:>7} {task_count:>7} tasks: save {save_seconds * 1000:9.1f} ms"
+          f" | {updates} updates {update_seconds / updates * 1e6:9.1f} us/update"
+          f" | load {load_seconds * 1000:9.1f} ms | list {list_seconds * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and SQLite project state backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+
+    for task_count in args.sizes:
+        root = tempfile.mkdtemp(prefix="nexus-state-bench-")
+        try:
+            bench_backend("json", ProjectStateManager(os.path.join(root, "json")), task_count, args.updates)
+            bench_backend("sqlite", SQLiteStateManager(os.path.join(root, "state.db")), task_count, args.updates)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import re
+from typing import List, Tuple
+
+OPEN_FENCE = re.compile(r"```(\w+)?\s*\n")
+CLOSE_FENCE = "```"
+
+
+class FencedBlockParser:
+    # Incremental equivalent of re.findall(r"```(\w+)?\s*\n([\s\S]*?)```"):
+    # feed text as it arrives and each (language, code) block is returned as
+    # soon as its closing fence is seen. language is the fence's tag in lower
+    # case, or "" if it has none.
+    def __init__(self):
+        self._buffer = ""
+        self._in_block = False
+        self._language = ""
+        self._scanned = 0
+        self.count = 0
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self._buffer += text
+        blocks = []
+        while True:
+            if not self._in_block:
+                match = OPEN_FENCE.search(self._buffer)
+                if match is None:
+                    # Keep a possibly incomplete opening fence for the next chunk.
+                    start = self._buffer.rfind(CLOSE_FENCE)
+                    self._buffer = self._buffer[start:] if start != -1 else self._buffer[-2:]
+                    return blocks
+                self._buffer = self._buffer[match.end():]
+                self._language = (match.group(1) or "").lower()
+                self._in_block = True
+                self._scanned = 0
+
+            # Only rescan the tail that could hold a fence split across chunks.
+            end = self._buffer.find(CLOSE_FENCE, max(0, self._scanned - len(CLOSE_FENCE) + 1))
+            if end == -1:
+                self._scanned = len(self._buffer)
+                return blocks
+            blocks.append((self._language, self._buffer[:end]))
+            self.count += 1
+            self._buffer = self._buffer[end + len(CLOSE_FENCE):]
+            self._in_block = False
+
+
+def extract_code_blocks(text: str) -> List[Tuple[str, str]]:
+    return FencedBlockParser().feed(text)
+
+
+PYTHON_LANGUAGES = {"python", "py", "python3"}
+
+# File extensions for fence tags; other tags are used as the extension as is.
+LANGUAGE_EXTENSIONS = {
+    "python": "py", "py": "py", "python3": "py",
+    "javascript": "js", "js": "js", "typescript": "ts", "ts": "ts",
+    "html": "html", "css": "css", "scss": "scss",
+    "bash": "sh", "sh": "sh", "shell": "sh", "zsh": "sh",
+    "json": "json", "yaml": "yml", "yml": "yml", "toml": "toml",
+    "sql": "sql", "markdown": "md", "md": "md",
+    "go": "go", "rust": "rs", "java": "java", "ruby": "rb", "php": "php",
+    "solidity": "sol", "text": "txt", "txt": "txt", "": "txt",
+}
+
+
+def extension_for(language: str) -> str:
+    return LANGUAGE_EXTENSIONS.get(language, language)
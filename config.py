@@ -52,3 +52,171 @@ AGENT_CONFIG = {
         "backstory": "You are an accomplished audio engineer and sound designer."
     }
 }
+
+MAX_PARALLEL_TASKS = int(os.getenv("NEXUS_MAX_PARALLEL_TASKS", "4"))
+
+# Limits for the feedback retry loop. A limit of 0 means unlimited. The task
+# budget covers every attempt and feedback call for one task; the project
+# budget covers all tasks of a project.
+RETRY_BUDGET = {
+    "max_attempts": int(os.getenv("NEXUS_TASK_MAX_ATTEMPTS", "3")),
+    "task": {
+        "max_calls": int(os.getenv("NEXUS_TASK_MAX_LLM_CALLS", "8")),
+        "max_tokens": int(os.getenv("NEXUS_TASK_MAX_TOKENS", "100000")),
+        "max_seconds": float(os.getenv("NEXUS_TASK_MAX_SECONDS", "900")),
+    },
+    "project": {
+        "max_calls": int(os.getenv("NEXUS_PROJECT_MAX_LLM_CALLS", "0")),
+        "max_tokens": int(os.getenv("NEXUS_PROJECT_MAX_TOKENS", "0")),
+        "max_seconds": float(os.getenv("NEXUS_PROJECT_MAX_SECONDS", "0")),
+    },
+}
+
+# Q-Arc test runs: suites are sharded across up to `shards` forked
+# processes (never fewer than min_tests_per_shard tests each), each test
+# phase is limited to test_timeout seconds and the whole run to run_timeout.
+# Each project workspace gets its own warm worker, up to max_workers.
+TEST_RUNNER = {
+    "shards": int(os.getenv("NEXUS_TEST_SHARDS", str(os.cpu_count() or 1))),
+    "min_tests_per_shard": int(os.getenv("NEXUS_TEST_MIN_PER_SHARD", "4")),
+    "test_timeout": float(os.getenv("NEXUS_TEST_TIMEOUT", "60")),
+    "run_timeout": float(os.getenv("NEXUS_TEST_RUN_TIMEOUT", "600")),
+    "max_workers": int(os.getenv("NEXUS_TEST_WORKERS", "4")),
+}
+
+# Backend for ExternalAPIManager.execute_code: "piston" posts snippets to the
+# remote Piston service. "local" runs Python snippets on this host in a pool
+# of worker processes limited only by rlimits, with no filesystem or network
+# isolation; enable it only for trusted input.
+SANDBOX = {
+    "backend": os.getenv("NEXUS_CODE_BACKEND", "piston"),
+    "workers": int(os.getenv("NEXUS_SANDBOX_WORKERS", str(os.cpu_count() or 1))),
+    # Longest a snippet waits for a free worker before failing.
+    "acquire_timeout": float(os.getenv("NEXUS_SANDBOX_ACQUIRE_TIMEOUT", "60")),
+    "limits": {
+        "cpu_seconds": int(os.getenv("NEXUS_SANDBOX_CPU_SECONDS", "5")),
+        "memory_mb": int(os.getenv("NEXUS_SANDBOX_MEMORY_MB", "256")),
+        "max_file_mb": int(os.getenv("NEXUS_SANDBOX_MAX_FILE_MB", "16")),
+        "max_open_files": 64,
+        "timeout": float(os.getenv("NEXUS_SANDBOX_TIMEOUT", "10")),
+        "max_output": 65536,
+    },
+    "piston_python_version": os.getenv("PISTON_PYTHON_VERSION", "3.10.0"),
+}
+
+# HTTP services used by ExternalAPIManager. Each endpoint gets a keep-alive
+# session per host and at most max_concurrent requests in flight; 429 and
+# 5xx responses are retried with jittered exponential backoff (honouring
+# Retry-After) up to max_retries times.
+EXTERNAL_APIS = {
+    "connect_timeout": float(os.getenv("NEXUS_HTTP_CONNECT_TIMEOUT", "5")),
+    "read_timeout": float(os.getenv("NEXUS_HTTP_READ_TIMEOUT", "60")),
+    "max_retries": int(os.getenv("NEXUS_HTTP_MAX_RETRIES", "3")),
+    "backoff_base": float(os.getenv("NEXUS_HTTP_BACKOFF_BASE", "0.5")),
+    "backoff_max": float(os.getenv("NEXUS_HTTP_BACKOFF_MAX", "30")),
+    "pool_maxsize": int(os.getenv("NEXUS_HTTP_POOL_MAXSIZE", "10")),
+    "endpoints": {
+        "stability": {
+            "base_url": os.getenv("STABILITY_API_URL", "https://api.stability.ai"),
+            "max_concurrent": int(os.getenv("STABILITY_MAX_CONCURRENT", "10")),
+            "read_timeout": float(os.getenv("STABILITY_READ_TIMEOUT", "120")),
+        },
+        "piston": {
+            "base_url": os.getenv("PISTON_API_URL", "https://emkc.org/api/v2/piston"),
+            "max_concurrent": int(os.getenv("PISTON_MAX_CONCURRENT", "4")),
+        },
+    },
+}
+
+# Stability text-to-image defaults. Generated images are cached by a digest
+# of engine, prompt, style, size, steps and cfg_scale; the cache drops the
+# least recently used images past cache_max_bytes.
+IMAGE_GENERATION = {
+    "engine": os.getenv("STABILITY_ENGINE", "stable-diffusion-v1-6"),
+    "width": int(os.getenv("NEXUS_IMAGE_WIDTH", "512")),
+    "height": int(os.getenv("NEXUS_IMAGE_HEIGHT", "512")),
+    "steps": int(os.getenv("NEXUS_IMAGE_STEPS", "30")),
+    "cfg_scale": float(os.getenv("NEXUS_IMAGE_CFG_SCALE", "7")),
+    # Upper bound on images per request when several are asked for at once.
+    "max_samples": int(os.getenv("NEXUS_IMAGE_MAX_SAMPLES", "10")),
+    "cache_enabled": os.getenv("NEXUS_IMAGE_CACHE", "1") == "1",
+    "cache_path": os.getenv("NEXUS_IMAGE_CACHE_PATH", os.path.join(".cache", "images")),
+    "cache_max_bytes": int(os.getenv("NEXUS_IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+}
+
+# Files produced by agents. Blobs are stored once per content hash under
+# path; each project gets a manifest there and a working copy of its latest
+# files in workspace_root/<project_id>. Older versions past max_versions
+# per file are dropped.
+ARTIFACTS = {
+    "path": os.getenv("NEXUS_ARTIFACT_DIR", os.path.join("projects", "artifacts")),
+    "workspace_root": os.getenv("NEXUS_WORKSPACE_DIR", "workspace"),
+    "max_versions": int(os.getenv("NEXUS_ARTIFACT_MAX_VERSIONS", "10")),
+}
+
+# Q-Arc reuses structured test results while the workspace's Python files,
+# the pytest arguments and the installed packages are unchanged.
+TEST_RESULT_CACHE = {
+    "enabled": os.getenv("NEXUS_TEST_CACHE", "1") == "1",
+    "path": os.getenv("NEXUS_TEST_CACHE_PATH", os.path.join(".cache", "test_results")),
+    "max_entries": int(os.getenv("NEXUS_TEST_CACHE_MAX_ENTRIES", "512")),
+}
+
+# Retries are driven by the local validators in validators.py. Set this to
+# also ask the planner model to explain a failed check before retrying.
+VALIDATION_LLM_FEEDBACK = os.getenv("NEXUS_VALIDATION_LLM_FEEDBACK", "0") == "1"
+
+# Shared LLM client pools, one per provider. max_in_flight caps concurrent
+# requests across every agent using that provider.
+LLM_PROVIDERS = {
+    "openai": {
+        "max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+        "max_keepalive_connections": int(os.getenv("OPENAI_MAX_KEEPALIVE", "10")),
+        "max_in_flight": int(os.getenv("OPENAI_MAX_IN_FLIGHT", "8")),
+        "timeout": float(os.getenv("OPENAI_TIMEOUT", "120")),
+    },
+}
+
+# Stream completions token by token so progress can be pushed to clients.
+LLM_STREAM_TOKENS = os.getenv("NEXUS_LLM_STREAM_TOKENS", "1") == "1"
+
+# Let CodeWeaver write each file as soon as its code block is complete
+# instead of waiting for the whole response.
+CODE_WEAVER_STREAMING = os.getenv("NEXUS_CODE_WEAVER_STREAMING", "1") == "1"
+
+# Parse the plan while it streams and start tasks with no dependencies
+# before the later phases have been generated.
+PLAN_STREAMING = os.getenv("NEXUS_PLAN_STREAMING", "1") == "1"
+
+# Opt-in on-disk cache of LLM responses, keyed by model, temperature, agent
+# role config and prompt. Only agents flagged below are cached.
+LLM_CACHE = {
+    "enabled": os.getenv("NEXUS_LLM_CACHE", "0") == "1",
+    "path": os.getenv("NEXUS_LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.db")),
+    "max_bytes": int(os.getenv("NEXUS_LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    "ttl_seconds": int(os.getenv("NEXUS_LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    "agents": {
+        "project_synapse": True,
+        "code_weaver": True,
+        "logic_sphere": True,
+        "q_arc": True,
+        "data_scientist": True,
+        "blockchain_developer": True,
+        "devops_engineer": True,
+        "pixel_genius": False,
+        "script_sensei": False,
+        "aura": False,
+    },
+}
+
+# Project state storage: "json" (snapshot + journal files) or "sqlite".
+STATE_BACKEND = os.getenv("NEXUS_STATE_BACKEND", "json")
+STATE_DIR = os.getenv("NEXUS_STATE_DIR", "projects")
+STATE_DB_PATH = os.getenv("NEXUS_STATE_DB", os.path.join("projects", "nexus_state.db"))
+
+# Seconds the write-behind persister waits to coalesce state changes before
+# writing them. 0 writes synchronously on the task path.
+STATE_FLUSH_WINDOW = float(os.getenv("NEXUS_STATE_FLUSH_WINDOW", "0.25"))
+
+# Worker threads executing queued task jobs behind the REST API.
+JOB_WORKERS = int(os.getenv("NEXUS_JOB_WORKERS", "4"))
@@ -0,0 +1,112 @@
+import contextvars
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List
+
+# (project_id, task_id) of the task running in the current thread, so deep
+# callbacks such as LLM token streaming know where to publish.
+current_task = contextvars.ContextVar("nexus_current_task", default=None)
+
+
+class Subscription:
+    def __init__(self, project_id: str, max_queue: int):
+        self.project_id = project_id
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def get(self, timeout: float = None) -> Dict[str, Any]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    # Fan-out of per-project progress events to live subscribers. A short
+    # history per project lets reconnecting clients resume from Last-Event-ID.
+    # Slow subscribers drop events rather than stall the publisher.
+    # Transient events (streamed tokens) go to live subscribers only, and
+    # history is kept for the max_projects most recently active projects.
+    TRANSIENT_EVENTS = frozenset({"llm_token"})
+
+    def __init__(self, history_size: int = 200, max_queue: int = 1000, max_projects: int = 256):
+        self.history_size = history_size
+        self.max_queue = max_queue
+        self.max_projects = max_projects
+        self._ids = itertools.count(1)
+        self._subscribers = {}
+        self._history = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, project_id: str, event_type: str, data: Dict[str, Any] = None):
+        if not project_id:
+            return
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "data": data or {}, "ts": time.time()}
+            if event_type not in self.TRANSIENT_EVENTS:
+                history = self._history.get(project_id)
+                if history is None:
+                    history = self._history[project_id] = deque(maxlen=self.history_size)
+                    while len(self._history) > self.max_projects:
+                        self._history.popitem(last=False)
+                else:
+                    self._history.move_to_end(project_id)
+                history.append(event)
+            subscribers = list(self._subscribers.get(project_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.dropped += 1
+
+    def subscribe(self, project_id: str, last_event_id: int = None) -> Subscription:
+        subscription = Subscription(project_id, self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history.get(project_id, ()):
+                    if event["id"] > last_event_id:
+                        subscription.queue.put_nowait(event)
+            self._subscribers.setdefault(project_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.project_id, None)
+
+    def forget(self, project_id: str):
+        # Drops the replay history of a deleted project.
+        with self._lock:
+            self._history.pop(project_id, None)
+
+    def subscriber_count(self, project_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(project_id, []))
+
+    def recent(self, project_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._history.get(project_id, ()))
+
+
+_default_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    return _default_bus
+
+
+def publish_task_event(event_type: str, data: Dict[str, Any] = None):
+    context = current_task.get()
+    if context is None:
+        return
+    project_id, task_id = context
+    payload = {"task_id": task_id}
+    payload.update(data or {})
+    _default_bus.publish(project_id, event_type, payload)
@@ -1,19 +1,135 @@
+import contextvars
 import os
-import requests
-from typing import Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from artifact_store import get_artifact_store
+from config import IMAGE_GENERATION, SANDBOX
+from http_client import HTTPClient, get_http_client
+from image_cache import ImageCache, get_image_cache, write_base64_fields
+from sandbox_pool import get_sandbox_pool, sandbox_supported
 
 class ExternalAPIManager:
-    def __init__(self):
+    def __init__(self, http: HTTPClient = None):
         self.stability_api_key = os.getenv("STABILITY_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        # Pass an HTTPClient with other base URLs to point at a stand-in server.
+        self.http = http or get_http_client()
     
-    def generate_image(self, prompt: str, style: str = "digital-art") -> Dict[str, Any]:
+    def generate_image(self, prompt: str, style: str = "digital-art", width: int = None, height: int = None,
+                       steps: int = None, cfg_scale: float = None) -> Dict[str, Any]:
+        params = self._image_params(width, height, steps, cfg_scale)
+        key = self._image_key(prompt, style, params)
+        cached = self._cached_image(key)
+        if cached:
+            return {"success": True, "image_path": cached, "cached": True}
+
         if not self.stability_api_key:
             return {"error": "Stability API key not configured"}
-        
+        return self._fetch_images(prompt, style, params, [key])[0]
+
+    def generate_images(self, prompts: List[str], style: str = "digital-art", width: int = None,
+                        height: int = None, steps: int = None, cfg_scale: float = None,
+                        distinct: bool = False) -> List[Dict[str, Any]]:
+        # Results come back in input order, one per prompt, each with its own
+        # error if it failed. Repeated prompts share one image unless distinct
+        # is set, in which case each repeat is a separate sample of a single
+        # request. Uncached prompts are requested concurrently.
+        params = self._image_params(width, height, steps, cfg_scale)
+        results: List[Dict[str, Any]] = [None] * len(prompts)
+        occurrences: Dict[str, int] = {}
+        missing: Dict[str, Dict[str, List[int]]] = {}
+        for index, prompt in enumerate(prompts):
+            variant = occurrences.get(prompt, 0) if distinct else 0
+            occurrences[prompt] = variant + 1
+            key = self._image_key(prompt, style, params, variant)
+            cached = self._cached_image(key)
+            if cached:
+                results[index] = {"success": True, "image_path": cached, "cached": True}
+            else:
+                missing.setdefault(prompt, {}).setdefault(key, []).append(index)
+
+        if missing and not self.stability_api_key:
+            for keys in missing.values():
+                for indices in keys.values():
+                    for index in indices:
+                        results[index] = {"error": "Stability API key not configured"}
+            return results
+
+        jobs = []
+        max_samples = max(1, IMAGE_GENERATION["max_samples"])
+        for prompt, keys in missing.items():
+            keys = list(keys)
+            for start in range(0, len(keys), max_samples):
+                jobs.append((prompt, keys[start:start + max_samples]))
+
+        if jobs:
+            workers = min(len(jobs), self.http.concurrency("stability"))
+            # Each job runs in a copy of the caller's context, so images land
+            # in the calling task's project.
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexus-images") as executor:
+                fetched = executor.map(
+                    lambda job: context.copy().run(self._fetch_images, job[0], style, params, job[1]), jobs)
+                for (prompt, keys), job_results in zip(jobs, fetched):
+                    for key, result in zip(keys, job_results):
+                        for index in missing[prompt][key]:
+                            results[index] = dict(result)
+        return results
+
+    def _image_params(self, width: int, height: int, steps: int, cfg_scale: float) -> Dict[str, Any]:
+        return {
+            "width": width or IMAGE_GENERATION["width"],
+            "height": height or IMAGE_GENERATION["height"],
+            "steps": steps or IMAGE_GENERATION["steps"],
+            "cfg_scale": cfg_scale if cfg_scale is not None else IMAGE_GENERATION["cfg_scale"]
+        }
+
+    def _image_key(self, prompt: str, style: str, params: Dict[str, Any], variant: int = 0) -> str:
+        return ImageCache.make_key(IMAGE_GENERATION["engine"], prompt, style, params["width"], params["height"],
+                                   params["steps"], params["cfg_scale"], variant)
+
+    def _image_name(self, key: str) -> str:
+        return f"generated_image_{key[:16]}.png"
+
+    def _publish_image(self, key: str, path: str) -> str:
+        # Images are copied into the current project's workspace through the
+        # artifact store, so evicting one from the cache frees its space and
+        # never breaks a file a project already uses.
+        return get_artifact_store().write_file(self._image_name(key), path, kind="image")["path"]
+
+    def _cached_image(self, key: str) -> str:
+        cache = get_image_cache()
+        if cache is None:
+            return None
+        path = cache.get(key)
+        if path is None:
+            return None
+        try:
+            return self._publish_image(key, path)
+        except OSError:
+            # Evicted between lookup and copy.
+            return None
+
+    def _fetch_images(self, prompt: str, style: str, params: Dict[str, Any], keys: List[str]) -> List[Dict[str, Any]]:
+        # One request for len(keys) samples of the same prompt; each sample is
+        # streamed into its own file under the matching key.
+        cache = get_image_cache()
+        if cache:
+            temp_paths = [cache.temp_path(key) for key in keys]
+        else:
+            workspace_dir = get_artifact_store().workspace_dir()
+            temp_paths = [os.path.join(workspace_dir, f".{key}.{threading.get_ident()}.tmp") for key in keys]
+
+        def open_output(index: int):
+            if index >= len(keys):
+                raise ValueError(f"Expected {len(keys)} images, got more")
+            return open(temp_paths[index], 'wb')
+
         try:
-            response = requests.post(
-                "https://api.stability.ai/v1/generation/stable-diffusion-v1-6/text-to-image",
+            response = self.http.post(
+                "stability",
+                f"/v1/generation/{IMAGE_GENERATION['engine']}/text-to-image",
                 headers={
                     "Content-Type": "application/json",
                     "Accept": "application/json",
@@ -21,26 +137,39 @@ class ExternalAPIManager:
                 },
                 json={
                     "text_prompts": [{"text": prompt}],
-                    "cfg_scale": 7,
-                    "height": 512,
-                    "width": 512,
-                    "samples": 1,
-                    "steps": 30,
+                    "cfg_scale": params["cfg_scale"],
+                    "height": params["height"],
+                    "width": params["width"],
+                    "samples": len(keys),
+                    "steps": params["steps"],
                     "style_preset": style
-                }
+                },
+                stream=True
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                image_path = f"workspace/generated_image_{hash(prompt)}.png"
-                with open(image_path, 'wb') as f:
-                    f.write(data['artifacts'][0]['base64'])
-                return {"success": True, "image_path": image_path}
-            else:
-                return {"error": f"API error: {response.status_code}", "details": response.text}
-                
+
+            with response:
+                if response.status_code != 200:
+                    error = {"error": f"API error: {response.status_code}", "details": response.text}
+                    return [dict(error) for _ in keys]
+                written = write_base64_fields(response.iter_content(chunk_size=65536), open_output)
+            if written < len(keys):
+                raise ValueError(f"Expected {len(keys)} images, got {written}")
+
+            results = []
+            for key, temp_path in zip(keys, temp_paths):
+                if cache:
+                    path = self._publish_image(key, cache.commit(key, temp_path))
+                else:
+                    path = self._publish_image(key, temp_path)
+                    os.remove(temp_path)
+                results.append({"success": True, "image_path": path, "cached": False})
+            return results
+
         except Exception as e:
-            return {"error": f"Failed to generate image: {str(e)}"}
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return [{"error": f"Failed to generate image: {str(e)}"} for _ in keys]
     
     def deploy_to_netlify(self, site_name: str) -> Dict[str, Any]:
         return {
@@ -49,15 +178,36 @@ class ExternalAPIManager:
             "message": "Deployment initiated (simulated)"
         }
     
+    def http_stats(self) -> Dict[str, Dict]:
+        # Per-endpoint request counts and latency, e.g. {"stability": {...}}.
+        return self.http.stats()
+
+    def _use_local_sandbox(self, language: str) -> bool:
+        return SANDBOX["backend"] == "local" and language == "python" and sandbox_supported()
+
     def execute_code(self, code: str, language: str = "python") -> Dict[str, Any]:
+        if self._use_local_sandbox(language):
+            return get_sandbox_pool().execute(code)
+        return self._execute_remote(code, language)
+
+    def execute_code_batch(self, snippets: List[str], language: str = "python") -> List[Dict[str, Any]]:
+        # Local snippets run concurrently across the sandbox pool; results
+        # keep the order of the input.
+        if self._use_local_sandbox(language):
+            return get_sandbox_pool().execute_batch(snippets)
+        return [self._execute_remote(code, language) for code in snippets]
+
+    def _execute_remote(self, code: str, language: str) -> Dict[str, Any]:
         try:
-            response = requests.post(
-                "https://emkc.org/api/v2/piston/execute",
+            response = self.http.post(
+                "piston",
+                "/execute",
                 json={
                     "language": language,
-                    "version": "3.10.0",
+                    "version": SANDBOX["piston_python_version"] if language == "python" else "*",
                     "files": [{"content": code}]
-                }
+                },
+                read_timeout=SANDBOX["limits"]["timeout"] + 20
             )
             
             if response.status_code == 200:
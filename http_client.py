@@ -0,0 +1,255 @@
+import atexit
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class EndpointStats:
+    def __init__(self, window: int = 256):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_status = None
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def record(self, seconds: float, status: int = None):
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.last_status = status
+            self._recent.append(seconds)
+            if status is None or status >= 400:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "in_flight": self.in_flight,
+                "avg_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0.0,
+                "p50_ms": _percentile_ms(recent, 0.5),
+                "p95_ms": _percentile_ms(recent, 0.95),
+                "max_ms": round(self.max_seconds * 1000, 1),
+                "last_status": self.last_status,
+            }
+
+
+def _percentile_ms(ordered, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+
+def _release_on_close(response: requests.Response, release):
+    # Runs release once, the first time the response is closed.
+    close = response.close
+    once = threading.Lock()
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if once.acquire(blocking=False):
+                release()
+
+    response.close = close_and_release
+
+
+class HTTPClient:
+    # Named endpoints ("stability", "piston", ...) map to a base URL and a
+    # concurrency limit. Connections are pooled per host and kept alive;
+    # every request carries a (connect, read) timeout.
+    def __init__(self, endpoints: Dict[str, Dict] = None, connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, pool_maxsize: int = 10, default_concurrency: int = 4):
+        self.endpoints = {name: dict(spec) for name, spec in (endpoints or {}).items()}
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_maxsize = pool_maxsize
+        self.default_concurrency = default_concurrency
+        self._sessions: Dict[str, requests.Session] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def url(self, endpoint: str, path: str = "") -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        base = self.endpoints.get(endpoint, {}).get("base_url")
+        if not base:
+            raise ValueError(f"No base URL configured for endpoint '{endpoint}'")
+        return base.rstrip("/") + "/" + path.lstrip("/") if path else base
+
+    def concurrency(self, endpoint: str) -> int:
+        return self.endpoints.get(endpoint, {}).get("max_concurrent") or self.default_concurrency
+
+    def _session(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+
+    def _slot(self, endpoint: str):
+        with self._lock:
+            semaphore = self._semaphores.get(endpoint)
+            if semaphore is None:
+                semaphore = self._semaphores[endpoint] = threading.BoundedSemaphore(self.concurrency(endpoint))
+                self._stats[endpoint] = EndpointStats()
+            return semaphore, self._stats[endpoint]
+
+    def _backoff(self, attempt: int, response: requests.Response = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.backoff_max)
+        # Full jitter keeps callers that failed together from retrying together.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, endpoint: str, method: str, path: str = "", read_timeout: float = None,
+                **kwargs) -> requests.Response:
+        url = self.url(endpoint, path)
+        session = self._session(url)
+        semaphore, stats = self._slot(endpoint)
+        if read_timeout is None:
+            read_timeout = self.endpoints.get(endpoint, {}).get("read_timeout") or self.read_timeout
+        timeout = (self.connect_timeout, read_timeout)
+
+        # The slot is held across backoff so a rate-limited endpoint is not
+        # hit harder by the callers queued behind it. With stream=True it is
+        # held until the response is closed, since the body is still being
+        # read from the endpoint.
+        semaphore.acquire()
+        stats.enter()
+        response = None
+        try:
+            attempt = 0
+            while True:
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, url, timeout=timeout, **kwargs)
+                except requests.ConnectionError:
+                    # Connection failures, including connect timeouts, are retried.
+                    stats.record(time.perf_counter() - started)
+                    if attempt >= self.max_retries:
+                        raise
+                    response = None
+                except requests.RequestException:
+                    # A read timeout is not retried: the server may still
+                    # be working on a request that is not safe to repeat.
+                    stats.record(time.perf_counter() - started)
+                    raise
+                else:
+                    stats.record(time.perf_counter() - started, response.status_code)
+                    if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                        break
+
+                delay = self._backoff(attempt, response)
+                if response is not None:
+                    response.close()
+                stats.retried()
+                print(f"[Nexus Prime] {endpoint} request failed "
+                      f"({response.status_code if response is not None else 'connection error'}), "
+                      f"retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+        except BaseException:
+            stats.exit()
+            semaphore.release()
+            raise
+
+        if not kwargs.get("stream"):
+            stats.exit()
+            semaphore.release()
+            return response
+        _release_on_close(response, lambda: (stats.exit(), semaphore.release()))
+        return response
+
+    def get(self, endpoint: str, path: str = "", **kwargs) -> requests.Response:
+        return self.request(endpoint, "GET", path, **kwargs)
+
+    def post(self, endpoint: str, path: str = "", **kwargs) -> requests.Response:
+        return self.request(endpoint, "POST", path, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            stats = dict(self._stats)
+        return {endpoint: s.snapshot() for endpoint, s in stats.items()}
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    from config import EXTERNAL_APIS
+
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient(
+                endpoints=EXTERNAL_APIS["endpoints"],
+                connect_timeout=EXTERNAL_APIS["connect_timeout"],
+                read_timeout=EXTERNAL_APIS["read_timeout"],
+                max_retries=EXTERNAL_APIS["max_retries"],
+                backoff_base=EXTERNAL_APIS["backoff_base"],
+                backoff_max=EXTERNAL_APIS["backoff_max"],
+                pool_maxsize=EXTERNAL_APIS["pool_maxsize"]
+            )
+        return _default_client
+
+
+@atexit.register
+def close_http_client():
+    if _default_client is not None:
+        _default_client.close()
@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Iterable
+
+_BASE64_KEY = b'"base64"'
+
+
+def write_base64_fields(chunks: Iterable[bytes], open_output: Callable[[int], BinaryIO]) -> int:
+    # Decodes every "base64" string field of a streamed JSON body straight
+    # into open_output(0), open_output(1), ... as the bytes arrive, so the
+    # payload is never held whole in memory. Returns the number written.
+    buffer = b""
+    state = "seek"
+    output = None
+    pending = b""
+    count = 0
+    for chunk in chunks:
+        buffer += chunk
+        while buffer:
+            if state == "seek":
+                index = buffer.find(_BASE64_KEY)
+                if index < 0:
+                    buffer = buffer[-(len(_BASE64_KEY) - 1):]
+                    break
+                buffer = buffer[index + len(_BASE64_KEY):]
+                state = "value"
+            elif state == "value":
+                stripped = buffer.lstrip(b" \t\r\n:")
+                if not stripped:
+                    buffer = b""
+                    break
+                if stripped[:1] != b'"':
+                    # "base64" was a value, not a key.
+                    buffer = stripped
+                    state = "seek"
+                    continue
+                buffer = stripped[1:]
+                output = open_output(count)
+                pending = b""
+                state = "data"
+            else:
+                end = buffer.find(b'"')
+                # Base64 has no backslashes; drop JSON escapes such as "\/".
+                pending += (buffer if end < 0 else buffer[:end]).replace(b"\\", b"")
+                usable = len(pending) // 4 * 4
+                output.write(base64.b64decode(pending[:usable]))
+                pending = pending[usable:]
+                if end < 0:
+                    buffer = b""
+                    break
+                if pending:
+                    output.write(base64.b64decode(pending + b"=" * (-len(pending) % 4)))
+                output.close()
+                output = None
+                count += 1
+                buffer = buffer[end + 1:]
+                state = "seek"
+    if output is not None:
+        output.close()
+        raise ValueError("Image payload ended mid-field")
+    return count
+
+
+class ImageCache:
+    # Generated PNGs keyed by a digest of every parameter that shapes the
+    # image. One file per key; past max_bytes the least recently used files
+    # are removed. Recency and sizes are tracked in memory, seeded once from
+    # the directory by mtime, so a commit never rescans the cache.
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = None
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _load_index(self) -> OrderedDict:
+        # Called with the lock held.
+        if self._index is None:
+            entries = []
+            for name in os.listdir(self.path):
+                if name.endswith('.png'):
+                    try:
+                        stat = os.stat(os.path.join(self.path, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._total = sum(self._index.values())
+        return self._index
+
+    def _track(self, key: str, size: int):
+        # Called with the lock held; marks key most recently used.
+        index = self._load_index()
+        self._total += size - index.pop(key, 0)
+        index[key] = size
+
+    @staticmethod
+    def make_key(engine: str, prompt: str, style: str, width: int, height: int, steps: int,
+                 cfg_scale: float, variant: int = 0) -> str:
+        # variant tells apart distinct images requested for the same prompt.
+        payload = json.dumps({
+            "engine": engine,
+            "prompt": prompt,
+            "style": style,
+            "size": [width, height],
+            "steps": steps,
+            "cfg_scale": cfg_scale,
+            "variant": variant
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.png")
+
+    def get(self, key: str) -> str:
+        path = self.path_for(key)
+        try:
+            # The mtime carries recency over to the next process's index.
+            os.utime(path)
+            size = os.path.getsize(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                if self._index is not None and key in self._index:
+                    self._total -= self._index.pop(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            self._track(key, size)
+        return path
+
+    def temp_path(self, key: str) -> str:
+        return f"{self.path_for(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def commit(self, key: str, temp_path: str) -> str:
+        path = self.path_for(key)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._track(key, size)
+            self._prune()
+        return path
+
+    def _prune(self):
+        # Called with the lock held. The newest image is always kept; files
+        # another process already removed just drop out of the index.
+        index = self._load_index()
+        while self._total > self.max_bytes and len(index) > 1:
+            key, size = index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            index = self._load_index()
+            return {"hits": self.hits, "misses": self.misses, "entries": len(index), "bytes": self._total}
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    from config import IMAGE_GENERATION
+
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None and IMAGE_GENERATION["cache_enabled"]:
+            _image_cache = ImageCache(IMAGE_GENERATION["cache_path"], IMAGE_GENERATION["cache_max_bytes"])
+        return _image_cache
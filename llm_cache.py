@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any
+
+from config import AGENT_CONFIG, LLM_CACHE
+
+
+class LLMResponseCache:
+    def __init__(self, path: str = None, max_bytes: int = None, ttl_seconds: int = None):
+        self.path = path or LLM_CACHE["path"]
+        self.max_bytes = max_bytes if max_bytes is not None else LLM_CACHE["max_bytes"]
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else LLM_CACHE["ttl_seconds"]
+        self._lock = threading.Lock()
+        self._counters = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, temperature: float, role_config: Dict[str, Any], prompt: str) -> str:
+        payload = json.dumps({
+            "model": model,
+            "temperature": temperature,
+            "role_config": role_config,
+            "prompt": prompt
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, agent: str, field: str):
+        counters = self._counters.setdefault(agent, {"hits": 0, "misses": 0, "stores": 0})
+        counters[field] += 1
+
+    def get(self, key: str, agent: str = "default") -> str:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row and self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= row[1]
+                row = None
+
+            if row is None:
+                self._count(agent, "misses")
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(agent, "hits")
+            return row[0]
+
+    def put(self, key: str, response: str, agent: str = "default"):
+        if not isinstance(response, str):
+            return
+
+        size = len(response.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent, response, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+            self._count(agent, "stores")
+
+    def _evict(self):
+        while self.max_bytes and self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "agents": {agent: dict(counters) for agent, counters in self._counters.items()}
+            }
+
+
+class CachedAgent:
+    # Stands in for a crewai Agent: execute_task is answered from the cache
+    # when possible, everything else is forwarded to the wrapped agent.
+    def __init__(self, agent, agent_key: str, llm, cache: LLMResponseCache = None):
+        self._agent = agent
+        self._agent_key = agent_key
+        self._llm = llm
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
+
+    def _role_config(self) -> Dict[str, Any]:
+        if self._agent_key in AGENT_CONFIG:
+            return AGENT_CONFIG[self._agent_key]
+        return {
+            "role": getattr(self._agent, "role", None),
+            "goal": getattr(self._agent, "goal", None),
+            "backstory": getattr(self._agent, "backstory", None)
+        }
+
+    def cache_key(self, prompt: str) -> str:
+        return LLMResponseCache.make_key(
+            getattr(self._llm, "model_name", None),
+            getattr(self._llm, "temperature", None),
+            self._role_config(),
+            prompt
+        )
+
+    def execute_task(self, task, **kwargs):
+        # Context/tools change what the model sees, so those calls bypass the cache.
+        if self._cache is None or kwargs or not isinstance(task, str):
+            return self._agent.execute_task(task=task, **kwargs)
+
+        key = self.cache_key(task)
+        response = self._cache.get(key, self._agent_key)
+        if response is not None:
+            print(f"[LLM Cache] Hit for {self._agent_key}")
+            return response
+
+        response = self._agent.execute_task(task=task)
+        self._cache.put(key, response, self._agent_key)
+        return response
+
+    def stream_task(self, task: str, stream):
+        # Streaming counterpart of execute_task: a hit is replayed as a single
+        # chunk, a miss is passed through and stored once it completes.
+        if self._cache is None:
+            yield from stream(task)
+            return
+
+        key = self.cache_key(task)
+        response = self._cache.get(key, self._agent_key)
+        if response is not None:
+            print(f"[LLM Cache] Hit for {self._agent_key}")
+            yield response
+            return
+
+        chunks = []
+        for chunk in stream(task):
+            chunks.append(chunk)
+            yield chunk
+        self._cache.put(key, "".join(chunks), self._agent_key)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
+
+
+def cached_agent(agent, agent_key: str, llm):
+    if not LLM_CACHE["enabled"] or not LLM_CACHE["agents"].get(agent_key, False):
+        return agent
+    return CachedAgent(agent, agent_key, llm, get_llm_cache())
+
+
+def stream_agent_task(agent, llm, prompt: str):
+    # Streams a completion for an agent's role straight from the chat model,
+    # going through the response cache when the agent is wrapped by one.
+    def stream(task):
+        messages = [
+            ("system", f"You are {agent.role}. {agent.goal}\n{agent.backstory}"),
+            ("human", task)
+        ]
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                yield chunk.content
+
+    if isinstance(agent, CachedAgent):
+        return agent.stream_task(prompt, stream)
+    return stream(prompt)
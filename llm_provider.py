@@ -0,0 +1,213 @@
+import threading
+import time
+from typing import Dict, Any
+
+import httpx
+
+from config import LLM_PROVIDERS, LLM_STREAM_TOKENS
+from events import publish_task_event
+from task_budget import record_llm_usage
+
+
+class ClientStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, seconds: float, error: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.requests - self.in_flight
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "total_seconds": round(self.total_seconds, 3),
+                "avg_seconds": round(self.total_seconds / completed, 3) if completed else 0.0
+            }
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class _LimitedTransport(httpx.BaseTransport):
+    # Wraps the provider's shared connection pool. The in-flight slot is held
+    # until the response body is closed so streamed completions count too.
+    def __init__(self, pool: httpx.HTTPTransport, semaphore: threading.BoundedSemaphore, stats: ClientStats):
+        self._pool = pool
+        self._semaphore = semaphore
+        self._stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._semaphore.acquire()
+        self._stats.started()
+        start = time.perf_counter()
+
+        def release(error=False):
+            self._stats.finished(time.perf_counter() - start, error)
+            self._semaphore.release()
+
+        try:
+            response = self._pool.handle_request(request)
+        except Exception:
+            release(error=True)
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, lambda: release(response.status_code >= 400)),
+            extensions=response.extensions,
+        )
+
+    def close(self):
+        # The pool is shared with the other clients of this provider.
+        pass
+
+
+class LLMClientProvider:
+    def __init__(self, providers: Dict[str, Dict[str, Any]] = None):
+        self.providers = providers or LLM_PROVIDERS
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._semaphores = {}
+        self._clients = {}
+        self._stats = {}
+
+    def _provider_pool(self, provider: str):
+        if provider not in self._pools:
+            settings = self.providers[provider]
+            self._pools[provider] = httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=settings["max_connections"],
+                    max_keepalive_connections=settings["max_keepalive_connections"],
+                ),
+            )
+            self._semaphores[provider] = threading.BoundedSemaphore(settings["max_in_flight"])
+        return self._pools[provider], self._semaphores[provider]
+
+    def get_llm(self, model: str, temperature: float, provider: str = "openai"):
+        key = (provider, model, temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build_client(provider, model, temperature)
+                self._clients[key] = client
+            return client
+
+    def _build_client(self, provider: str, model: str, temperature: float):
+        if provider != "openai":
+            raise ValueError(f"Unsupported LLM provider: {provider}")
+
+        from langchain_openai import ChatOpenAI
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class TaskTokenPublisher(BaseCallbackHandler):
+            # Forwards streamed tokens to the event stream of whichever task
+            # is running in the calling thread.
+            def on_llm_new_token(self, token: str, **kwargs):
+                publish_task_event("llm_token", {"token": token})
+
+        class UsageRecorder(BaseCallbackHandler):
+            # Charges each completion to the usage meters of the calling
+            # task. Streamed responses carry no usage block, so those are
+            # estimated from prompt size and the number of streamed tokens.
+            def __init__(self):
+                self._estimates = {}
+
+            def on_chat_model_start(self, serialized, messages, run_id=None, **kwargs):
+                chars = sum(len(str(getattr(m, "content", m))) for batch in messages for m in batch)
+                self._estimates[run_id] = chars // 4
+
+            def on_llm_start(self, serialized, prompts, run_id=None, **kwargs):
+                self._estimates[run_id] = sum(len(p) for p in prompts) // 4
+
+            def on_llm_new_token(self, token: str, run_id=None, **kwargs):
+                if run_id in self._estimates:
+                    self._estimates[run_id] += 1
+
+            def on_llm_end(self, response, run_id=None, **kwargs):
+                estimate = self._estimates.pop(run_id, 0)
+                usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+                record_llm_usage(usage.get("total_tokens") or estimate)
+
+            def on_llm_error(self, error, run_id=None, **kwargs):
+                record_llm_usage(self._estimates.pop(run_id, 0))
+
+        pool, semaphore = self._provider_pool(provider)
+        stats = ClientStats()
+        self._stats[(provider, model, temperature)] = stats
+        http_client = httpx.Client(
+            transport=_LimitedTransport(pool, semaphore, stats),
+            timeout=self.providers[provider]["timeout"],
+        )
+        return ChatOpenAI(
+            model_name=model,
+            temperature=temperature,
+            http_client=http_client,
+            streaming=LLM_STREAM_TOKENS,
+            callbacks=[UsageRecorder(), TaskTokenPublisher()] if LLM_STREAM_TOKENS else [UsageRecorder()],
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                f"{provider}/{model}@{temperature}": stats.snapshot()
+                for (provider, model, temperature), stats in self._stats.items()
+            }
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+            self._semaphores.clear()
+            self._clients.clear()
+
+
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+
+def get_llm_provider() -> LLMClientProvider:
+    global _default_provider
+    with _default_provider_lock:
+        if _default_provider is None:
+            _default_provider = LLMClientProvider()
+        return _default_provider
+
+
+def get_llm(model: str, temperature: float, provider: str = "openai"):
+    return get_llm_provider().get_llm(model, temperature, provider)
@@ -1,153 +1,246 @@
+import copy
 import json
 import re
+import threading
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Dict, List
-from agents.project_manager import ProjectManagerAgent
-from agents.code_weaver import CodeWeaverAgent
-from agents.logic_sphere import LogicSphereAgent
-from agents.q_arc import QArcAgent
-from agents.pixel_genius import PixelGeniusAgent
-from agents.script_sensei import ScriptSenseiAgent
-from agents.aura import AuraAgent
-from agents.data_scientist import DataScientistAgent
-from agents.blockchain_developer import BlockchainDeveloperAgent
-from agents.devops_engineer import DevOpsEngineerAgent
-from state_manager import ProjectStateManager
+from config import MAX_PARALLEL_TASKS, PLAN_STREAMING, RETRY_BUDGET, VALIDATION_LLM_FEEDBACK
+from agents.registry import AgentRegistry
+from artifact_store import get_artifact_store
+from events import current_task, get_event_bus, publish_task_event
+from plan_parser import IncrementalPlanParser
+from state_manager import create_state_manager
+from state_persister import WriteBehindPersister
+from task_budget import Budget, BudgetExceeded, UsageMeter, metering
+from task_graph import TaskGraph
+from validators import validate_result
 
-class NexusCore:
-    def __init__(self):
-        self.project_manager = ProjectManagerAgent()
-        self.code_weaver = CodeWeaverAgent()
-        self.logic_sphere = LogicSphereAgent()
-        self.q_arc = QArcAgent()
-        self.pixel_genius = PixelGeniusAgent()
-        self.script_sensei = ScriptSenseiAgent()
-        self.aura = AuraAgent()
-        self.data_scientist = DataScientistAgent()
-        self.blockchain_developer = BlockchainDeveloperAgent()
-        self.devops_engineer = DevOpsEngineerAgent()
-        self.state_manager = ProjectStateManager()
-        self.active_project_id = None
-        self.active_plan = None
-        self.workspace_state = {}
-        self.task_status = {}
+def summarize_progress(plan: Dict, task_graph: TaskGraph) -> Dict:
+    progress = task_graph.progress()
+    completed = progress['completed']
+    total = progress['total']
 
-    def create_project(self, user_command: str) -> str:
-        project_id = str(uuid.uuid4())[:8]
-        self.active_project_id = project_id
-        
-        print(f"[Nexus Prime] Creating new project: {project_id}")
-        print(f"[Nexus Prime] Received command: {user_command}")
-        print("[Nexus Prime] Formulating plan...")
+    return {
+        "project_name": plan['project_name'],
+        "progress": f"{completed}/{total} tasks completed",
+        "percentage": (completed / total) * 100 if total > 0 else 0
+    }
+
+class ProjectSession:
+    # Per-project execution state. Sessions are cheap and hold no agents or
+    # clients, so one engine can drive many projects concurrently.
+    def __init__(self, engine, project_id: str, plan: Dict, workspace_state: Dict = None, task_status: Dict = None):
+        self.engine = engine
+        self.project_id = project_id
+        self.active_plan = plan
+        self.workspace_state = workspace_state if workspace_state is not None else {}
+        self.task_status = task_status if task_status is not None else {}
+        self.task_graph = TaskGraph(self.active_plan, self.task_status)
+        self._state_lock = threading.RLock()
+        # LLM usage of the whole project, carried over from persisted task costs.
+        costs = [info.get('cost') or {} for info in self.task_status.values()]
+        self.usage = UsageMeter(
+            sum(cost.get('calls', 0) for cost in costs),
+            sum(cost.get('tokens', 0) for cost in costs),
+            sum(cost.get('seconds', 0) for cost in costs),
+            running=False
+        )
+        # While the plan is still streaming in, each new task resolves
+        # _plan_signal so a waiting run_to_completion can pick it up.
+        self.planning = False
+        self.plan_error = None
+        self._plan_signal = Future()
 
-        plan_json = self.project_manager.create_plan(user_command)
+    def is_busy(self) -> bool:
+        with self._state_lock:
+            return self.planning or self.task_graph.counts.get('in_progress', 0) > 0
 
+    def flush(self, timeout: float = None) -> bool:
+        return self.engine.persister.flush(self.project_id, timeout=timeout)
+
+    def consume_plan(self, events, parser: IncrementalPlanParser):
         try:
-            self.active_plan = self._parse_plan(plan_json)
-            print(f"[Nexus Prime] Plan '{self.active_plan['project_name']}' created successfully!")
-            
-            self._initialize_task_status()
-            
-            self._save_project_state()
-            
-            return project_id
-            
-        except (json.JSONDecodeError, KeyError) as e:
+            for event in events:
+                self.apply_plan_event(event)
+            if not parser.done:
+                raise ValueError("plan stream ended before the plan was complete")
+        except Exception as e:
             print(f"[Nexus Prime] Error: Failed to parse plan. {e}")
-            print(f"Raw output: {plan_json}")
-            return None
+            self.finish_planning(str(e))
+        else:
+            self.finish_planning()
 
-    def load_project(self, project_id: str) -> bool:
-        project_data = self.state_manager.load_project(project_id)
-        if project_data:
-            self.active_project_id = project_id
-            self.active_plan = project_data['state']['active_plan']
-            self.workspace_state = project_data['state']['workspace_state']
-            self.task_status = project_data['state']['task_status']
-            print(f"[Nexus Prime] Loaded project: {self.active_plan['project_name']}")
-            return True
-        return False
-
-    def _initialize_task_status(self):
-        self.task_status = {}
-        for phase in self.active_plan['phases']:
-            for task in phase['tasks']:
-                self.task_status[task['id']] = {
-                    'status': 'pending',
-                    'dependencies': task.get('dependencies', []),
-                    'dependencies_met': False
-                }
+    def apply_plan_event(self, event):
+        kind, key, value = event
+        with self._state_lock:
+            if kind == 'field':
+                self.active_plan[key] = value
+                return
+            phases = self.active_plan['phases']
+            while len(phases) <= key:
+                phases.append({"name": f"Phase {len(phases) + 1}", "description": "", "tasks": []})
+            if kind == 'phase':
+                phases[key].update({name: item for name, item in value.items() if name != 'tasks'})
+                self._save_project_state()
+                return
+
+            phases[key]['tasks'].append(value)
+            self.task_graph.add_task(value)
+            self._record_task_update(value['id'])
+            self._signal_plan_update()
+
+        print(f"[Nexus Prime] Planned Task {value['id']} ({value['agent']}): {value['description']}")
+        self.engine.events.publish(self.project_id, "plan_task", {
+            "task_id": value['id'],
+            "agent": value['agent'],
+            "phase": key,
+            "dependencies": value.get('dependencies', [])
+        })
+
+    def finish_planning(self, error: str = None):
+        with self._state_lock:
+            self.planning = False
+            self.plan_error = error
+            self._save_project_state()
+            self._signal_plan_update()
+        print(f"[Nexus Prime] Plan '{self.active_plan['project_name']}' complete: {self.task_graph.total} tasks")
+        self.engine.events.publish(self.project_id, "plan_complete", {"tasks": self.task_graph.total, "error": error})
+
+    def _signal_plan_update(self):
+        signal, self._plan_signal = self._plan_signal, Future()
+        signal.set_result(None)
 
     def _check_dependencies(self, task_id: int) -> bool:
-        task_info = self.task_status[task_id]
-        if not task_info['dependencies']:
-            return True
-            
-        for dep_id in task_info['dependencies']:
-            if self.task_status[dep_id]['status'] != 'completed':
-                return False
-        return True
+        return self.task_graph.unmet.get(task_id) == 0
 
     def _get_next_task(self) -> Dict:
-        all_tasks = []
-        for phase in self.active_plan['phases']:
-            all_tasks.extend(phase['tasks'])
-            
-        for task in all_tasks:
-            task_id = task['id']
-            if (self.task_status[task_id]['status'] == 'pending' and 
-                self._check_dependencies(task_id)):
-                return task
-        return None
+        return self.task_graph.next_ready()
 
     def execute_next_task(self) -> Dict:
-        next_task = self._get_next_task()
+        next_task = self.claim_next_task()
         if not next_task:
             print("[Nexus Prime] No tasks available for execution")
             return None
-            
-        task_id = next_task['id']
-        agent_name = next_task['agent']
-        
-        print(f"[Nexus Prime] Executing Task {task_id} with {agent_name}")
-        self.task_status[task_id]['status'] = 'in_progress'
-        self._save_project_state()
-        
+
+        return self.run_task(next_task)
+
+    def execute_ready_tasks(self, max_workers: int = None) -> Dict:
+        ready_tasks = []
+        while True:
+            task = self.claim_next_task()
+            if not task:
+                break
+            ready_tasks.append(task)
+
+        if not ready_tasks:
+            print("[Nexus Prime] No tasks available for execution")
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max_workers or MAX_PARALLEL_TASKS,
+                                thread_name_prefix="nexus-task") as executor:
+            results = executor.map(self.run_task, ready_tasks)
+            return {task['id']: result for task, result in zip(ready_tasks, results)}
+
+    def run_to_completion(self, max_workers: int = None) -> Dict:
+        max_workers = max_workers or MAX_PARALLEL_TASKS
+        results = {}
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nexus-task") as executor:
+            while True:
+                # Taken before claiming, so a task planned in between still
+                # wakes the wait below.
+                with self._state_lock:
+                    plan_signal = self._plan_signal if self.planning else None
+
+                # Keep the pool full: dependents become claimable as soon as
+                # the tasks they wait on complete.
+                while len(in_flight) < max_workers:
+                    task = self.claim_next_task()
+                    if not task:
+                        break
+                    in_flight[executor.submit(self.run_task, task)] = task['id']
+
+                waiting = set(in_flight)
+                if plan_signal is not None:
+                    waiting.add(plan_signal)
+                if not waiting:
+                    break
+
+                done, _ = wait(waiting, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in in_flight:
+                        results[in_flight.pop(future)] = future.result()
+
+        print(f"[Nexus Prime] Run finished: {len(results)} tasks executed")
+        return results
+
+    def claim_next_task(self) -> Dict:
+        with self._state_lock:
+            next_task = self._get_next_task()
+            if not next_task:
+                return None
+
+            task_id = next_task['id']
+            print(f"[Nexus Prime] Executing Task {task_id} with {next_task['agent']}")
+            self.task_graph.set_status(task_id, 'in_progress')
+            self._record_task_update(task_id)
+            self._publish_task_status(task_id, agent=next_task['agent'])
+            return next_task
+
+    def run_task(self, task: Dict) -> Dict:
+        task_id = task['id']
+        context = current_task.set((self.project_id, task_id))
         try:
-            result = self._execute_task_with_feedback(next_task)
-            
-            self.task_status[task_id]['status'] = 'completed'
-            self.workspace_state[f"task_{task_id}"] = result
-            self._save_project_state()
-            
+            result = self._execute_task_with_feedback(task)
+
+            with self._state_lock:
+                self.task_graph.set_status(task_id, 'completed')
+                self.workspace_state[f"task_{task_id}"] = result
+                self._record_task_update(task_id, f"task_{task_id}")
+                files = result.get('files') if isinstance(result, dict) else None
+                self._publish_task_status(task_id, files=files, cost=self.task_status[task_id].get('cost'))
+
             print(f"[Nexus Prime] Task {task_id} completed successfully")
             return result
-            
+
         except Exception as e:
             print(f"[Nexus Prime] Task {task_id} failed: {e}")
-            self.task_status[task_id]['status'] = 'failed'
-            self.task_status[task_id]['error'] = str(e)
-            self._save_project_state()
+            with self._state_lock:
+                self.task_graph.set_status(task_id, 'failed')
+                self.task_status[task_id]['error'] = str(e)
+                self._record_task_update(task_id)
+                self._publish_task_status(task_id, error=str(e))
             return {"error": str(e)}
 
+        finally:
+            current_task.reset(context)
+
+    def _publish_task_status(self, task_id, **details):
+        data = {"task_id": task_id, "status": self.task_status[task_id]['status']}
+        data.update(details)
+        self.engine.events.publish(self.project_id, "task_status", data)
+        self.engine.events.publish(self.project_id, "progress", self.get_project_status())
+
     def _execute_task(self, task: Dict) -> Dict:
         agent_name = task['agent']
         task_description = task['description']
         
         if agent_name == 'CodeWeaver':
-            return self.code_weaver.write_code(
+            return self.engine.agents.get('CodeWeaver').write_code(
                 task_description=task_description,
                 context=self.active_plan['objective']
             )
                 
         elif agent_name == 'LogicSphere':
             if any(keyword in task_description.lower() for keyword in ['algorithm', 'sort', 'search', 'optimize']):
-                return self.logic_sphere.design_algorithm(
+                return self.engine.agents.get('LogicSphere').design_algorithm(
                     problem_description=task_description,
                     constraints=self.active_plan['objective']
                 )
             elif any(keyword in task_description.lower() for keyword in ['architecture', 'system', 'design', 'cloud']):
-                return self.logic_sphere.design_architecture(
+                return self.engine.agents.get('LogicSphere').design_architecture(
                     requirements=task_description,
                     scale="medium"
                 )
@@ -156,24 +249,20 @@ class NexusCore:
                 
         elif agent_name == 'Q-Arc':
             if any(keyword in task_description.lower() for keyword in ['test', 'validate', 'quality']):
-                code_files = [f for f in self.workspace_state.keys() if 'files' in self.workspace_state[f]]
-                if code_files:
-                    latest_task = code_files[-1]
-                    code_file = self.workspace_state[latest_task]['files'][0]
-                    result = self.q_arc.write_tests(code_file, task_description)
+                code_file = self._latest_code_file()
+                if code_file:
+                    result = self.engine.agents.get('Q-Arc').write_tests(code_file, task_description)
                     
                     if 'test_file' in result:
-                        test_result = self.q_arc.run_tests(result['test_file'])
+                        test_result = self.engine.agents.get('Q-Arc').run_tests(result['test_file'])
                         result['test_results'] = test_result
                     return result
                 else:
                     return {"error": "No code files found to test"}
             elif any(keyword in task_description.lower() for keyword in ['review', 'inspect', 'audit']):
-                code_files = [f for f in self.workspace_state.keys() if 'files' in self.workspace_state[f]]
-                if code_files:
-                    latest_task = code_files[-1]
-                    code_file = self.workspace_state[latest_task]['files'][0]
-                    return self.q_arc.perform_code_review(code_file)
+                code_file = self._latest_code_file()
+                if code_file:
+                    return self.engine.agents.get('Q-Arc').perform_code_review(code_file)
                 else:
                     return {"error": "No code files found to review"}
             else:
@@ -181,13 +270,13 @@ class NexusCore:
                 
         elif agent_name == 'PixelGenius':
             if any(keyword in task_description.lower() for keyword in ['ui', 'design', 'interface', 'layout']):
-                result = self.pixel_genius.design_ui(
+                result = self.engine.agents.get('PixelGenius').design_ui(
                     requirements=task_description,
                     platform="web"
                 )
                 
                 if 'error' not in result:
-                    css_code = self.pixel_genius.generate_css(result)
+                    css_code = self.engine.agents.get('PixelGenius').generate_css(result)
                     result['css_code'] = css_code
                 return result
             else:
@@ -195,19 +284,19 @@ class NexusCore:
                 
         elif agent_name == 'ScriptSensei':
             if any(keyword in task_description.lower() for keyword in ['content', 'copy', 'text', 'write']):
-                return self.script_sensei.create_content(
+                return self.engine.agents.get('ScriptSensei').create_content(
                     topic=task_description,
                     format="web content",
                     tone="professional"
                 )
             elif any(keyword in task_description.lower() for keyword in ['story', 'narrative', 'plot']):
-                return self.script_sensei.develop_story(
+                return self.engine.agents.get('ScriptSensei').develop_story(
                     premise=task_description,
                     genre="fantasy",
                     length="short"
                 )
             elif any(keyword in task_description.lower() for keyword in ['dialogue', 'script', 'conversation']):
-                return self.script_sensei.generate_dialogue(
+                return self.engine.agents.get('ScriptSensei').generate_dialogue(
                     characters=["Character A", "Character B"],
                     context=task_description
                 )
@@ -216,12 +305,12 @@ class NexusCore:
                 
         elif agent_name == 'Aura':
             if any(keyword in task_description.lower() for keyword in ['sound', 'audio', 'sfx']):
-                return self.aura.design_soundscape(
+                return self.engine.agents.get('Aura').design_soundscape(
                     context=task_description,
                     mood="appropriate"
                 )
             elif any(keyword in task_description.lower() for keyword in ['music', 'score', 'composition']):
-                return self.aura.compose_music_brief(
+                return self.engine.agents.get('Aura').compose_music_brief(
                     requirements=task_description
                 )
             else:
@@ -229,12 +318,12 @@ class NexusCore:
                 
         elif agent_name == 'DataScientist':
             if any(keyword in task_description.lower() for keyword in ['data', 'analyze', 'analysis']):
-                return self.data_scientist.analyze_data(
+                return self.engine.agents.get('DataScientist').analyze_data(
                     data_description=task_description,
                     objectives=self.active_plan['objective']
                 )
             elif any(keyword in task_description.lower() for keyword in ['machine learning', 'ml', 'model']):
-                return self.data_scientist.design_ml_model(
+                return self.engine.agents.get('DataScientist').design_ml_model(
                     problem=task_description,
                     data_type="structured"  # Default for demo
                 )
@@ -243,7 +332,7 @@ class NexusCore:
                 
         elif agent_name == 'BlockchainDeveloper':
             if any(keyword in task_description.lower() for keyword in ['blockchain', 'smart contract', 'crypto']):
-                return self.blockchain_developer.design_smart_contract(
+                return self.engine.agents.get('BlockchainDeveloper').design_smart_contract(
                     requirements=task_description,
                     platform="Ethereum"  # Default for demo
                 )
@@ -252,7 +341,7 @@ class NexusCore:
                 
         elif agent_name == 'DevOpsEngineer':
             if any(keyword in task_description.lower() for keyword in ['infrastructure', 'deploy', 'devops']):
-                return self.devops_engineer.design_infrastructure(
+                return self.engine.agents.get('DevOpsEngineer').design_infrastructure(
                     requirements=task_description,
                     cloud_provider="AWS"  # Default for demo
                 )
@@ -262,100 +351,138 @@ class NexusCore:
         else:
             return {"error": f"Unknown agent: {agent_name}"}
 
+    def _latest_code_file(self) -> str:
+        # Indexed in the project's artifact manifest as files are written.
+        return self.engine.artifacts.latest('code', self.project_id)
+
     def _execute_task_with_feedback(self, task: Dict) -> Dict:
-        max_attempts = 3
-        attempt = 0
+        max_attempts = RETRY_BUDGET['max_attempts']
+        task_budget = Budget.from_config(RETRY_BUDGET['task'])
+        project_budget = Budget.from_config(RETRY_BUDGET['project'])
+        meter = UsageMeter()
+        attempts = []
+        stop_reason = None
         result = None
-        
-        while attempt < max_attempts:
-            attempt += 1
-            print(f"[Nexus Prime] Attempt {attempt} for task {task['id']}")
-            
-            result = self._execute_task(task)
-            
-            if self._needs_improvement(result, task):
-                print(f"[Nexus Prime] Task {task['id']} needs improvement, analyzing...")
-                feedback = self._analyze_result(result, task)
-                print(f"[Nexus Prime] Feedback: {feedback}")
-                
-                enhanced_task = task.copy()
-                enhanced_task['description'] = f"{task['description']}. Previous attempt issues: {feedback}. Please fix these issues."
-                
-                result = self._execute_task(enhanced_task)
-            else:
-                break
-                
+
+        exhausted = project_budget.exceeded(self.usage)
+        if exhausted:
+            raise BudgetExceeded(f"Project {exhausted}")
+
+        try:
+            with metering(meter, self.usage):
+                attempt_task = task
+                for attempt in range(1, max_attempts + 1):
+                    print(f"[Nexus Prime] Attempt {attempt} for task {task['id']}")
+                    publish_task_event("task_attempt", {"attempt": attempt, "max_attempts": max_attempts})
+
+                    before = meter.snapshot()
+                    result = self._execute_task(attempt_task)
+                    record = {"attempt": attempt, "cost": self._cost_since(before, meter.snapshot())}
+                    attempts.append(record)
+
+                    # Every result, including an improved one, is checked
+                    # before deciding whether another round is worth paying for.
+                    issues = self._needs_improvement(result, task)
+                    record["issues"] = issues
+                    if not issues:
+                        break
+                    if attempt == max_attempts:
+                        stop_reason = "max attempts reached"
+                        break
+                    stop_reason = self._budget_exhausted(task_budget, project_budget, meter)
+                    if stop_reason:
+                        break
+
+                    print(f"[Nexus Prime] Task {task['id']} needs improvement, analyzing...")
+                    before = meter.snapshot()
+                    feedback = self._analyze_result(result, task, issues)
+                    record["feedback"] = feedback
+                    record["feedback_cost"] = self._cost_since(before, meter.snapshot())
+                    print(f"[Nexus Prime] Feedback: {feedback}")
+                    publish_task_event("task_feedback", {"attempt": attempt, "feedback": feedback})
+
+                    stop_reason = self._budget_exhausted(task_budget, project_budget, meter)
+                    if stop_reason:
+                        break
+
+                    attempt_task = task.copy()
+                    attempt_task['description'] = f"{task['description']}. Previous attempt issues: {feedback}. Please fix these issues."
+        finally:
+            cost = meter.snapshot()
+            # Wall time is charged to the project once the task is done; calls
+            # and tokens were charged as they happened.
+            self.usage.add(seconds=cost['seconds'])
+            if stop_reason:
+                print(f"[Nexus Prime] Task {task['id']} stopped retrying: {stop_reason}")
+            with self._state_lock:
+                status = self.task_status[task['id']]
+                status['attempts'] = attempts
+                status['cost'] = cost
+                status['retry_stopped'] = stop_reason
+
         return result
-    
-    def _needs_improvement(self, result: Dict, task: Dict) -> bool:
-        if 'error' in result:
-            return True
-            
-        if 'test_results' in result and result['test_results'].get('status') == 'FAIL':
-            return True
-            
-        if 'response' in result and any(keyword in result['response'].lower() 
-                                      for keyword in ['issue', 'problem', 'error', 'improve', 'better']):
-            return True
-            
-        return False
-    
-    def _analyze_result(self, result: Dict, task: Dict) -> str:
-        agent_name = task['agent']
+
+    def _budget_exhausted(self, task_budget: Budget, project_budget: Budget, meter: UsageMeter) -> str:
+        exhausted = task_budget.exceeded(meter)
+        if exhausted:
+            return f"task {exhausted}"
+        exhausted = project_budget.exceeded(self.usage)
+        if exhausted:
+            return f"project {exhausted}"
+        return None
+
+    @staticmethod
+    def _cost_since(before: Dict, after: Dict) -> Dict:
+        return {key: round(after[key] - before[key], 3) for key in after}
+
+    def _needs_improvement(self, result: Dict, task: Dict) -> List[str]:
+        # Deterministic checks only; an empty list means the result is kept.
+        return validate_result(result, task, self.engine.artifacts.workspace_dir(self.project_id))
+
+    def _analyze_result(self, result: Dict, task: Dict, issues: List[str]) -> str:
+        feedback = "; ".join(issues)
+        # The failed checks are usually specific enough to act on; a model
+        # diagnosis is only bought when configured and a check has failed.
+        if not VALIDATION_LLM_FEEDBACK or not isinstance(result, dict) or 'response' not in result:
+            return feedback
+
+        prompt = f"""
+        Analyze this task result and provide specific feedback for improvement:
         
-        if agent_name == 'CodeWeaver' and 'test_results' in result:
-            failures = result['test_results'].get('failures', [])
-            if failures:
-                return f"Tests failed: {', '.join(failures)}"
-                
-        if 'error' in result:
-            return f"Error occurred: {result['error']}"
-            
-        if 'response' in result:
-            prompt = f"""
-            Analyze this task result and provide specific feedback for improvement:
-            
-            Task: {task['description']}
-            Result: {result['response']}
-            
-            Provide concise feedback on what needs to be improved.
-            """
-            return self.project_manager.agent.execute_task(task=prompt)
-            
-        return "Unknown issue needs addressing"
+        Task: {task['description']}
+        Result: {result['response']}
+        Failed checks: {feedback}
+        
+        Provide concise feedback on what needs to be improved.
+        """
+        return self.engine.agents.get('ProjectManager').agent.execute_task(task=prompt)
 
     def _save_project_state(self):
-        if self.active_project_id:
+        if self.project_id:
             state = {
                 "active_plan": self.active_plan,
                 "workspace_state": self.workspace_state,
                 "task_status": self.task_status
             }
-            self.state_manager.save_project(self.active_project_id, state)
+            self.engine.persister.save(self.project_id, state)
+
+    def _record_task_update(self, task_id, workspace_key: str = None):
+        if not self.project_id:
+            return
+        # Journal only what changed; the result goes first so a task is never
+        # persisted as completed without its output.
+        events = []
+        if workspace_key:
+            events.append({"op": "workspace", "key": workspace_key, "value": self.workspace_state[workspace_key]})
+        # Copy the status: it keeps changing while the record waits to be flushed.
+        events.append({"op": "task_status", "task_id": task_id, "status": copy.deepcopy(self.task_status[task_id])})
+        self.engine.persister.record(self.project_id, events)
 
     def get_project_status(self) -> Dict:
         if not self.active_plan:
             return {"error": "No active project"}
             
-        completed = 0
-        total = 0
-        for task_id, status in self.task_status.items():
-            total += 1
-            if status['status'] == 'completed':
-                completed += 1
-                
-        return {
-            "project_name": self.active_plan['project_name'],
-            "progress": f"{completed}/{total} tasks completed",
-            "percentage": (completed / total) * 100 if total > 0 else 0
-        }
-
-    def _parse_plan(self, plan_text: str) -> dict:
-        json_match = re.search(r'```json\n(.*?)\n```', plan_text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        else:
-            return json.loads(plan_text)
+        return summarize_progress(self.active_plan, self.task_graph)
 
     def _review_plan(self):
         print("\n--- PROJECT PLAN REVIEW ---")
@@ -365,7 +492,181 @@ class NexusCore:
             for task in phase['tasks']:
                 print(f"  [Task {task['id']}] ({task['agent']}): {task['description']}")
 
+class NexusCore:
+    # Shared engine: agents, LLM clients, persistence and events. The
+    # project-facing methods below act on a default session for callers
+    # that work with one project at a time.
+    def __init__(self):
+        self.agents = AgentRegistry()
+        self.state_manager = create_state_manager()
+        self.persister = WriteBehindPersister(self.state_manager)
+        self.events = get_event_bus()
+        self.artifacts = get_artifact_store()
+        self.session = None
+
+    def create_session(self, user_command: str) -> ProjectSession:
+        project_id = str(uuid.uuid4())[:8]
+        
+        print(f"[Nexus Prime] Creating new project: {project_id}")
+        print(f"[Nexus Prime] Received command: {user_command}")
+        print("[Nexus Prime] Formulating plan...")
+
+        if PLAN_STREAMING:
+            return self._create_streaming_session(project_id, user_command)
+
+        plan_json = self.agents.get('ProjectManager').create_plan(user_command)
+
+        try:
+            plan = self._parse_plan(plan_json)
+            session = ProjectSession(self, project_id, plan)
+            print(f"[Nexus Prime] Plan '{plan['project_name']}' created successfully!")
+            
+            session._save_project_state()
+            
+            return session
+            
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"[Nexus Prime] Error: Failed to parse plan. {e}")
+            print(f"Raw output: {plan_json}")
+            return None
+
+    def _create_streaming_session(self, project_id: str, user_command: str) -> ProjectSession:
+        parser = IncrementalPlanParser()
+        events = self._plan_events(self.agents.get('ProjectManager').stream_plan(user_command), parser)
+        plan = {"project_name": None, "objective": user_command, "phases": []}
+
+        # Hold the session back only until the plan has a name or a first
+        # task; the rest is consumed in the background while tasks run.
+        backlog = []
+        try:
+            for event in events:
+                if event[0] == 'field':
+                    plan[event[1]] = event[2]
+                else:
+                    backlog.append(event)
+                if event[0] == 'task' or event[1] == 'project_name':
+                    break
+            else:
+                if not parser.done:
+                    # Not the fenced/bare JSON the parser expects: fall back
+                    # to parsing the whole response.
+                    session = ProjectSession(self, project_id, self._parse_plan(parser.text))
+                    session._save_project_state()
+                    return session
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"[Nexus Prime] Error: Failed to parse plan. {e}")
+            print(f"Raw output: {parser.text}")
+            return None
+
+        session = ProjectSession(self, project_id, plan)
+        session.planning = True
+        for event in backlog:
+            session.apply_plan_event(event)
+        session._save_project_state()
+        print(f"[Nexus Prime] Plan '{plan['project_name']}' is streaming, starting ready tasks early")
+
+        threading.Thread(
+            target=session.consume_plan,
+            args=(events, parser),
+            name=f"nexus-plan-{project_id}",
+            daemon=True
+        ).start()
+        return session
+
+    def _plan_events(self, chunks, parser: IncrementalPlanParser):
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+
+    def open_session(self, project_id: str) -> ProjectSession:
+        self.persister.flush(project_id)
+        project_data = self.state_manager.load_project(project_id)
+        if project_data:
+            state = project_data['state']
+            session = ProjectSession(
+                self,
+                project_id,
+                state['active_plan'],
+                state['workspace_state'],
+                state['task_status']
+            )
+            print(f"[Nexus Prime] Loaded project: {session.active_plan['project_name']}")
+            return session
+        return None
+
+    def create_project(self, user_command: str) -> str:
+        session = self.create_session(user_command)
+        if session is None:
+            return None
+        self.session = session
+        return session.project_id
+
+    def load_project(self, project_id: str) -> bool:
+        session = self.open_session(project_id)
+        if session is None:
+            return False
+        self.session = session
+        return True
+
+    @property
+    def active_project_id(self):
+        return self.session.project_id if self.session else None
+
+    @property
+    def active_plan(self):
+        return self.session.active_plan if self.session else None
+
+    @property
+    def workspace_state(self):
+        return self.session.workspace_state if self.session else {}
+
+    @property
+    def task_status(self):
+        return self.session.task_status if self.session else {}
+
+    @property
+    def task_graph(self):
+        return self.session.task_graph if self.session else None
+
+    def execute_next_task(self) -> Dict:
+        if not self.session:
+            print("[Nexus Prime] No active project")
+            return None
+        return self.session.execute_next_task()
+
+    def execute_ready_tasks(self, max_workers: int = None) -> Dict:
+        if not self.session:
+            print("[Nexus Prime] No active project")
+            return {}
+        return self.session.execute_ready_tasks(max_workers)
+
+    def run_to_completion(self, max_workers: int = None) -> Dict:
+        if not self.session:
+            print("[Nexus Prime] No active project")
+            return {}
+        return self.session.run_to_completion(max_workers)
+
+    def get_project_status(self) -> Dict:
+        if not self.session:
+            return {"error": "No active project"}
+        return self.session.get_project_status()
+
+    def flush(self, timeout: float = None) -> bool:
+        return self.persister.flush(timeout=timeout)
+
+    def get_persistence_stats(self) -> Dict:
+        return self.persister.stats.snapshot()
+
+    def _parse_plan(self, plan_text: str) -> dict:
+        json_match = re.search(r'```json\n(.*?)\n```', plan_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(1))
+        else:
+            return json.loads(plan_text)
+
 if __name__ == "__main__":
     nexus = NexusCore()
     test_command = "Create a simple weather dashboard web app with a clean UI that displays current weather and forecast. Include tests and a brief documentation."
-    nexus.execute_command(test_command)
+    if nexus.create_project(test_command):
+        nexus.run_to_completion()
+        nexus.flush()
+        print(nexus.get_project_status())
@@ -0,0 +1,122 @@
+import json
+from typing import Any, List, Tuple
+
+PLAN_FENCE = "```json\n"
+WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start", "expect_key")
+
+    def __init__(self, kind: str, start: int):
+        self.kind = kind
+        self.key = None if kind == "object" else 0
+        self.start = start
+        self.expect_key = kind == "object"
+
+
+class IncrementalPlanParser:
+    # Scans a plan as it streams in and reports pieces as soon as they are
+    # complete:
+    #   ("field", key, value)          top-level scalar such as project_name
+    #   ("task", phase_index, task)    phases[i].tasks[j]
+    #   ("phase", phase_index, phase)  phases[i], once all of its tasks are in
+    # Only the completed slices are handed to json.loads; the scanner itself
+    # just tracks nesting, strings and the current key path.
+    def __init__(self):
+        self.text = ""
+        self.plan = None
+        self._pos = 0
+        self._started = False
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._scalar_start = None
+
+    @property
+    def done(self) -> bool:
+        return self.plan is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any, Any]]:
+        self.text += chunk
+        events = []
+        if self.done or not self._find_start():
+            return events
+
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    frame = self._stack[-1]
+                    if frame.kind == "object" and frame.expect_key:
+                        frame.key = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._complete(self._string_start, i + 1, events)
+                i += 1
+                continue
+
+            if self._scalar_start is not None and (c in WHITESPACE or c in ",]}"):
+                self._complete(self._scalar_start, i, events)
+                self._scalar_start = None
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == "{" or c == "[":
+                self._stack.append(_Frame("object" if c == "{" else "array", i))
+            elif c == "}" or c == "]":
+                frame = self._stack.pop()
+                self._complete(frame.start, i + 1, events)
+            elif c == ":":
+                self._stack[-1].expect_key = False
+            elif c == ",":
+                frame = self._stack[-1]
+                if frame.kind == "object":
+                    frame.expect_key = True
+                else:
+                    frame.key += 1
+            elif c not in WHITESPACE and self._scalar_start is None:
+                self._scalar_start = i
+            i += 1
+
+        self._pos = i
+        return events
+
+    def _find_start(self) -> bool:
+        # Same rule as NexusCore._parse_plan: the ```json fenced block if
+        # there is one, otherwise the response must be bare JSON.
+        if self._started:
+            return True
+        fence = self.text.find(PLAN_FENCE)
+        if fence != -1:
+            start = self.text.find("{", fence + len(PLAN_FENCE))
+        elif self.text.lstrip().startswith("{"):
+            start = self.text.find("{")
+        else:
+            return False
+        if start == -1:
+            return False
+        self._pos = start
+        self._started = True
+        return True
+
+    def _complete(self, start: int, end: int, events: List):
+        if not self._stack:
+            self.plan = json.loads(self.text[start:end])
+            return
+
+        path = [frame.key for frame in self._stack]
+        if len(path) == 1 and self._stack[0].kind == "object" and path[0] != "phases":
+            events.append(("field", path[0], json.loads(self.text[start:end])))
+        elif len(path) == 4 and path[0] == "phases" and path[2] == "tasks":
+            events.append(("task", path[1], json.loads(self.text[start:end])))
+        elif len(path) == 2 and path[0] == "phases":
+            events.append(("phase", path[1], json.loads(self.text[start:end])))
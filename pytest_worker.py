@@ -0,0 +1,619 @@
+import atexit
+import hashlib
+import json
+import math
+import os
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+MAX_OUTPUT_CHARS = 20000
+MAX_MESSAGE_CHARS = 2000
+SLOWEST_TESTS = 10
+TIMEOUT_MARKER = "per-test timeout"
+
+
+class PerTestTimeout(Exception):
+    pass
+
+
+class ResultCollector:
+    # pytest plugin recording one outcome per test instead of scraping the
+    # terminal report. With a stream, each finished test is also written out
+    # as a JSON line so the parent keeps partial results if the run is killed.
+    def __init__(self, stream=None):
+        self.tests = {}
+        self.collection_errors = []
+        self.collected = []
+        self.stream = stream
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.collection_errors.append({
+                "nodeid": report.nodeid,
+                "message": str(report.longrepr)[-MAX_MESSAGE_CHARS:]
+            })
+
+    def pytest_collection_finish(self, session):
+        self.collected = [item.nodeid for item in session.items]
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.tests.setdefault(report.nodeid, {
+            "nodeid": report.nodeid,
+            "outcome": "passed",
+            "duration": 0.0,
+            "message": None
+        })
+        entry["duration"] = round(entry["duration"] + report.duration, 6)
+
+        if report.skipped and entry["outcome"] == "passed":
+            entry["outcome"] = "skipped"
+        elif report.failed:
+            entry["message"] = self._message(report)
+            if TIMEOUT_MARKER in entry["message"]:
+                entry["outcome"] = "timeout"
+            else:
+                # A failure outside the test body itself is an error, as pytest reports it.
+                entry["outcome"] = "failed" if report.when == "call" else "error"
+
+        if report.when == "teardown" and self.stream is not None:
+            self.stream.write(json.dumps({"test": entry}) + "\n")
+
+    @staticmethod
+    def _message(report) -> str:
+        crash = getattr(report.longrepr, "reprcrash", None)
+        if crash is not None:
+            return crash.message[-MAX_MESSAGE_CHARS:]
+        return str(report.longrepr)[-MAX_MESSAGE_CHARS:]
+
+
+def _timeout_plugin(seconds: float):
+    # SIGALRM around each test phase: a hanging test fails on its own instead
+    # of taking its whole shard down with it.
+    import pytest
+
+    def alarm(signum, frame):
+        raise PerTestTimeout(f"exceeded {seconds}s {TIMEOUT_MARKER}")
+
+    class TimeoutPlugin:
+        def _guard(self):
+            previous = signal.signal(signal.SIGALRM, alarm)
+            signal.setitimer(signal.ITIMER_REAL, seconds)
+            try:
+                yield
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_runtest_setup(self, item):
+            yield from self._guard()
+
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_runtest_call(self, item):
+            yield from self._guard()
+
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_runtest_teardown(self, item):
+            yield from self._guard()
+
+    return TimeoutPlugin()
+
+
+def summarize(tests: List[Dict], collection_errors: List[Dict]) -> Dict:
+    summary = {"passed": 0, "failed": 0, "error": 0, "skipped": 0, "timeout": 0}
+    for test in tests:
+        summary[test["outcome"]] += 1
+    summary["error"] += len(collection_errors)
+    return summary
+
+
+def _run_pytest(request: Dict, args: List[str], stream=None, collect_only: bool = False) -> Dict:
+    # Runs in a forked child (or a one-shot interpreter): pytest output goes
+    # to a temp file so the protocol channel stays clean.
+    import pytest
+
+    os.chdir(request["cwd"])
+    sys.path.insert(0, request["cwd"])
+    collector = ResultCollector(stream)
+    plugins = [collector]
+    if request.get("test_timeout") and hasattr(signal, "setitimer") and not collect_only:
+        plugins.append(_timeout_plugin(request["test_timeout"]))
+    extra = ["--collect-only", "-q"] if collect_only else []
+
+    with tempfile.TemporaryFile(mode="w+") as output:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        exit_code = pytest.main(list(args) + extra + ["-p", "no:cacheprovider"], plugins=plugins)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        output.seek(0)
+        text = output.read()
+
+    return {
+        "exit_code": int(exit_code),
+        "tests": list(collector.tests.values()),
+        "collected": collector.collected,
+        "collection_errors": collector.collection_errors,
+        "output": text[-MAX_OUTPUT_CHARS:]
+    }
+
+
+def _fork(target, *args):
+    # Child reports JSON lines over a pipe; returns (pid, read end).
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        with os.fdopen(write_fd, "w", buffering=1) as pipe:
+            try:
+                pipe.write(json.dumps({"done": target(pipe, *args)}) + "\n")
+            except BaseException as e:
+                pipe.write(json.dumps({"error": f"{type(e).__name__}: {e}"}) + "\n")
+        os._exit(0)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def _gather(children: Dict[int, int], deadline: float) -> (Dict[int, List[Dict]], set):
+    # Reads every child's messages until all pipes close or the deadline
+    # passes; children still running then are killed. Keyed by pid.
+    messages = {pid: [] for pid in children}
+    buffers = {fd: b"" for fd in children.values()}
+    pids = {fd: pid for pid, fd in children.items()}
+    open_fds = set(pids)
+    while open_fds:
+        remaining = deadline - time.monotonic() if deadline else None
+        if remaining is not None and remaining <= 0:
+            break
+        ready, _, _ = select.select(list(open_fds), [], [], remaining)
+        for fd in ready:
+            data = os.read(fd, 65536)
+            if not data:
+                open_fds.discard(fd)
+                continue
+            buffers[fd] += data
+            while b"\n" in buffers[fd]:
+                line, buffers[fd] = buffers[fd].split(b"\n", 1)
+                messages[pids[fd]].append(json.loads(line))
+
+    killed = {pids[fd] for fd in open_fds}
+    for pid in killed:
+        os.kill(pid, signal.SIGKILL)
+    for pid, fd in children.items():
+        os.waitpid(pid, 0)
+        os.close(fd)
+    return messages, killed
+
+
+def _shard(test_ids: List[str], shards: int) -> List[List[str]]:
+    # Contiguous slices keep a module's tests, and its module-scoped
+    # fixtures, in as few shards as possible.
+    size = math.ceil(len(test_ids) / shards)
+    return [test_ids[i:i + size] for i in range(0, len(test_ids), size)]
+
+
+def _run_forked(request: Dict) -> Dict:
+    # Children import the code under test, so every run sees the current
+    # files and nothing leaks into the warm parent.
+    started = time.perf_counter()
+    run_timeout = request.get("run_timeout")
+    deadline = time.monotonic() + run_timeout if run_timeout else None
+    args = list(request["args"])
+    collection_errors = []
+    shards = [args]
+    sharded = request.get("shards", 1) > 1
+
+    if sharded:
+        pid, fd = _fork(lambda pipe: _run_pytest(request, args, collect_only=True))
+        messages, killed = _gather({pid: fd}, deadline)
+        done = next((m["done"] for m in messages[pid] if "done" in m), None)
+        if done is None:
+            error = next((m["error"] for m in messages[pid] if "error" in m), None)
+            return {"error": error or ("collection timed out" if killed else "collection process died")}
+        collection_errors = done["collection_errors"]
+        if collection_errors or not done["collected"]:
+            return _merge([done], {}, set(), started)
+        per_shard = max(1, request.get("min_tests_per_shard", 1))
+        count = min(request["shards"], math.ceil(len(done["collected"]) / per_shard))
+        shards = _shard(done["collected"], count)
+
+    children = dict(_fork(lambda pipe, ids=ids: _run_pytest(request, ids, stream=pipe)) for ids in shards)
+    messages, killed = _gather(children, deadline)
+    # Unsharded runs pass the raw arguments, which are not test ids.
+    shard_ids = dict(zip(children, shards)) if sharded else {}
+    return _merge([], messages, killed, started, shard_ids, run_timeout)
+
+
+def _merge(finished: List[Dict], messages: Dict[int, List[Dict]], killed: set, started: float,
+           shard_ids: Dict[int, List[str]] = None, run_timeout: float = None) -> Dict:
+    tests = {}
+    outputs = []
+    collection_errors = []
+    errors = []
+    exit_codes = []
+    for done in finished:
+        for test in done["tests"]:
+            tests[test["nodeid"]] = test
+        exit_codes.append(done["exit_code"])
+        collection_errors.extend(done["collection_errors"])
+        outputs.append(done["output"])
+
+    for pid, shard_messages in messages.items():
+        for message in shard_messages:
+            if "test" in message:
+                tests[message["test"]["nodeid"]] = message["test"]
+            elif "done" in message:
+                done = message["done"]
+                exit_codes.append(done["exit_code"])
+                collection_errors.extend(done["collection_errors"])
+                outputs.append(done["output"])
+                for test in done["tests"]:
+                    tests.setdefault(test["nodeid"], test)
+            elif "error" in message:
+                errors.append(message["error"])
+        if pid in killed:
+            outputs.append(f"[shard killed after the {run_timeout}s run timeout]")
+            for nodeid in (shard_ids or {}).get(pid, []):
+                tests.setdefault(nodeid, {
+                    "nodeid": nodeid,
+                    "outcome": "timeout",
+                    "duration": 0.0,
+                    "message": f"not finished within the {run_timeout}s run timeout"
+                })
+
+    # Report tests in collection order when it is known.
+    order = [nodeid for ids in (shard_ids or {}).values() for nodeid in ids]
+    ordered = [tests[nodeid] for nodeid in order if nodeid in tests]
+    ordered += [test for nodeid, test in tests.items() if nodeid not in set(order)]
+
+    summary = summarize(ordered, collection_errors)
+    if summary["failed"] or summary["error"] or summary["timeout"] or errors or killed:
+        exit_code = max([1] + [code for code in exit_codes if code != 5])
+    elif not ordered:
+        exit_code = exit_codes[0] if exit_codes else 5
+    else:
+        exit_code = 0
+
+    result = {
+        "exit_code": exit_code,
+        "tests": ordered,
+        "collection_errors": collection_errors,
+        "summary": summary,
+        "shards": max(1, len(messages)),
+        "timed_out": bool(killed),
+        "slowest": sorted(ordered, key=lambda test: test["duration"], reverse=True)[:SLOWEST_TESTS],
+        "duration": round(time.perf_counter() - started, 6),
+        "output": "\n".join(outputs)[-MAX_OUTPUT_CHARS:]
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def _run_once(request: Dict) -> Dict:
+    # Platforms without fork still get a fresh interpreter per run, just
+    # without the warm imports or sharding.
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--once"],
+            input=json.dumps(request),
+            capture_output=True,
+            text=True,
+            timeout=request.get("run_timeout") or None
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"test run exceeded the {request['run_timeout']}s run timeout"}
+    if completed.returncode != 0 or not completed.stdout.strip():
+        return {"error": completed.stderr.strip() or f"test process exited with {completed.returncode}"}
+    return json.loads(completed.stdout)
+
+
+def _warm_up():
+    # A throwaway collection in an empty directory imports pytest's internals
+    # and every entry-point plugin once, so forked runs start with them loaded.
+    import pytest
+
+    with tempfile.TemporaryDirectory() as empty, open(os.devnull, "w") as devnull:
+        saved = os.dup(1)
+        os.dup2(devnull.fileno(), 1)
+        try:
+            pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", empty])
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def serve():
+    # Worker loop: one JSON request per line on stdin, one JSON response per
+    # line on the original stdout. Anything else printed goes to stderr.
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    try:
+        import pytest
+        _warm_up()
+        protocol.write(json.dumps({"ready": True, "pytest": pytest.__version__}) + "\n")
+    except ImportError as e:
+        protocol.write(json.dumps({"ready": False, "error": str(e)}) + "\n")
+        return
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        response = _run_forked(request) if hasattr(os, "fork") else _run_once(request)
+        response["id"] = request.get("id")
+        protocol.write(json.dumps(response) + "\n")
+
+
+class PytestWorker:
+    # Client side of a long-lived worker process for one workspace. Runs are
+    # serialized per worker; a dead or stuck worker is restarted on the next run.
+    def __init__(self, workspace_dir: str, shards: int = 1, test_timeout: float = None,
+                 run_timeout: float = None, min_tests_per_shard: int = 1):
+        self.workspace_dir = os.path.abspath(workspace_dir)
+        self.shards = shards
+        self.test_timeout = test_timeout
+        self.run_timeout = run_timeout
+        self.min_tests_per_shard = min_tests_per_shard
+        self._process = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._next_id = 0
+        self.runs = 0
+        self.restarts = 0
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        ready = json.loads(self._process.stdout.readline() or '{"ready": false, "error": "worker exited"}')
+        if not ready.get("ready"):
+            self._stop()
+            raise RuntimeError(f"pytest worker unavailable: {ready.get('error')}")
+        print(f"[Q-Arc] Started pytest worker (pytest {ready['pytest']}) for {self.workspace_dir}")
+
+    def _stop(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def _alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _read_response(self, timeout: float) -> str:
+        # The worker enforces the run timeout itself; this only guards
+        # against the worker wedging, with some slack for collection.
+        # Returns None if it was killed for that, "" if it exited.
+        if timeout and not select.select([self._process.stdout], [], [], timeout + 30)[0]:
+            self._process.kill()
+            return None
+        return self._process.stdout.readline()
+
+    def run(self, args: List[str], cwd: str = None) -> Dict:
+        with self._lock:
+            try:
+                return self._run_locked(args, cwd)
+            finally:
+                # A caller may still run on a worker that was closed; it
+                # then does not keep a process behind.
+                if self._closed:
+                    self._stop()
+
+    def _run_locked(self, args: List[str], cwd: str = None) -> Dict:
+        for attempt in range(2):
+            if not self._alive():
+                if self._process is not None:
+                    self.restarts += 1
+                self._start()
+            self._next_id += 1
+            request = {
+                "id": self._next_id,
+                "cwd": os.path.abspath(cwd) if cwd else self.workspace_dir,
+                "args": list(args),
+                "shards": self.shards,
+                "min_tests_per_shard": self.min_tests_per_shard,
+                "test_timeout": self.test_timeout,
+                "run_timeout": self.run_timeout
+            }
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                line = self._read_response(self.run_timeout)
+            except (BrokenPipeError, OSError):
+                line = ""
+            if line:
+                self.runs += 1
+                return json.loads(line)
+            self._stop()
+            if line is None:
+                # Re-sending a run that wedged the worker would only wedge it again.
+                return {"error": f"pytest worker did not answer within {self.run_timeout + 30}s"}
+        return {"error": "pytest worker died while running tests"}
+
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            self._stop()
+
+
+def interpreter_fingerprint() -> str:
+    # Python build plus every installed distribution and its version: a
+    # dependency upgrade must not be answered from the cache.
+    global _fingerprint
+    if _fingerprint is None:
+        from importlib import metadata
+        packages = sorted(f"{dist.metadata['Name']}=={dist.version}" for dist in metadata.distributions())
+        digest = hashlib.sha256()
+        digest.update(f"{sys.executable}\n{sys.version}\n".encode())
+        digest.update("\n".join(packages).encode())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+_fingerprint = None
+
+
+class ResultCache:
+    # Structured test results keyed by the content of the workspace's Python
+    # files, the pytest arguments and the interpreter fingerprint. One JSON
+    # file per key; the least recently used are pruned past max_entries.
+    def __init__(self, path: str, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file_digest(self, path: str) -> str:
+        # Re-hash only files whose size or mtime changed since the last key.
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._digests[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+        return digest
+
+    def key(self, workspace_dir: str, args: List[str]) -> str:
+        # Every module a test can import counts, not only the file under test.
+        digest = hashlib.sha256()
+        digest.update(interpreter_fingerprint().encode())
+        digest.update(json.dumps(list(args)).encode())
+        for root, dirs, files in os.walk(workspace_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    path = os.path.join(root, name)
+                    relative = os.path.relpath(path, workspace_dir)
+                    digest.update(f"{relative}\0{self._file_digest(path)}\n".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Dict:
+        path = os.path.join(self.path, f"{key}.json")
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict):
+        path = os.path.join(self.path, f"{key}.json")
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(temp_path, path)
+        self._prune()
+
+    def _prune(self):
+        entries = [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.json')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: os.stat(entry).st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    # Imported here: the worker process runs this file as a script and has
+    # no use for the orchestrator's settings.
+    from config import TEST_RESULT_CACHE
+
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None and TEST_RESULT_CACHE["enabled"]:
+            _result_cache = ResultCache(TEST_RESULT_CACHE["path"], TEST_RESULT_CACHE["max_entries"])
+        return _result_cache
+
+
+_workers = OrderedDict()
+_workers_lock = threading.Lock()
+
+
+def get_pytest_worker(workspace_dir: str) -> PytestWorker:
+    # One worker per workspace, so projects test in parallel. Past
+    # max_workers the least recently used idle workers are shut down.
+    from config import TEST_RUNNER
+
+    key = os.path.abspath(workspace_dir)
+    evicted = []
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is None:
+            worker = _workers[key] = PytestWorker(
+                key,
+                shards=TEST_RUNNER["shards"],
+                test_timeout=TEST_RUNNER["test_timeout"],
+                run_timeout=TEST_RUNNER["run_timeout"],
+                min_tests_per_shard=TEST_RUNNER["min_tests_per_shard"]
+            )
+        _workers.move_to_end(key)
+        idle = [other for other_key, other in _workers.items() if other_key != key and not other.busy()]
+        for other in idle[:max(0, len(_workers) - TEST_RUNNER["max_workers"])]:
+            del _workers[other.workspace_dir]
+            evicted.append(other)
+    for other in evicted:
+        other.close()
+    return worker
+
+
+@atexit.register
+def close_pytest_workers():
+    with _workers_lock:
+        workers = list(_workers.values())
+    for worker in workers:
+        worker.close()
+
+
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        # _run_pytest takes over fd 1 for pytest's output.
+        protocol = os.fdopen(os.dup(1), "w")
+        request = json.loads(sys.stdin.read())
+        started = time.perf_counter()
+        protocol.write(json.dumps(_merge([_run_pytest(request, request["args"])], {}, set(), started)))
+        protocol.close()
+    else:
+        serve()
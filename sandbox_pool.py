@@ -0,0 +1,307 @@
+import atexit
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+DEFAULT_LIMITS = {
+    "cpu_seconds": 5,
+    "memory_mb": 256,
+    "max_file_mb": 16,
+    "max_open_files": 64,
+    "timeout": 10.0,
+    "max_output": 65536,
+}
+
+
+def _apply_limits(limits: Dict):
+    import resource
+
+    cpu = int(limits["cpu_seconds"])
+    memory = int(limits["memory_mb"]) * 1024 * 1024
+    file_size = int(limits["max_file_mb"]) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limits["max_open_files"], limits["max_open_files"]))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def _describe_signal(signum: int) -> str:
+    if signum == signal.SIGXCPU:
+        return "CPU time limit exceeded"
+    if signum == signal.SIGXFSZ:
+        return "File size limit exceeded"
+    return f"Killed by signal {signal.Signals(signum).name}"
+
+
+def _run_snippet(request: Dict, limits: Dict) -> Dict:
+    # One forked child per snippet, in its own scratch directory and process
+    # group, so limits and leftovers die with it.
+    scratch = tempfile.mkdtemp(prefix="nexus-sandbox-")
+    out_path = os.path.join(scratch, ".stdout")
+    err_path = os.path.join(scratch, ".stderr")
+    timeout = request.get("timeout") or limits["timeout"]
+    started = time.perf_counter()
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.setsid()
+            os.chdir(scratch)
+            stdin = os.open(os.devnull, os.O_RDONLY)
+            stdout = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+            stderr = os.open(err_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+            os.dup2(stdin, 0)
+            os.dup2(stdout, 1)
+            os.dup2(stderr, 2)
+            _apply_limits(limits)
+            sys.argv = ["<snippet>"]
+            sys.path[0] = scratch
+            code = compile(request["code"], "<snippet>", "exec")
+            exec(code, {"__name__": "__main__", "__builtins__": __builtins__})
+            status = 0
+        except SystemExit as e:
+            if isinstance(e.code, int) or e.code is None:
+                status = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException as e:
+            import traceback
+            # Skip this frame so the traceback starts in the snippet.
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(status)
+
+    # Poll with backoff: most snippets finish in a few milliseconds.
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    wait_status = None
+    while True:
+        done, wait_status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 0.02)
+
+    timed_out = not done
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    if timed_out:
+        _, wait_status = os.waitpid(pid, 0)
+
+    output = _read_tail(out_path, limits["max_output"])
+    error = _read_tail(err_path, limits["max_output"])
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    exit_code = os.waitstatus_to_exitcode(wait_status)
+    if timed_out:
+        error += f"\nExecution timed out after {timeout}s"
+    elif exit_code < 0:
+        error += f"\n{_describe_signal(-exit_code)}"
+    return {
+        "success": True,
+        "output": output,
+        "error": error.strip(),
+        "exit_code": exit_code,
+        "timed_out": timed_out,
+        "duration": round(time.perf_counter() - started, 6)
+    }
+
+
+def _read_tail(path: str, limit: int) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - limit))
+            return f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def serve(limits: Dict):
+    # Worker loop: one JSON request per line on stdin, one JSON response per
+    # line on the original stdout.
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = _run_snippet(json.loads(line), limits)
+        except Exception as e:
+            response = {"error": f"Sandbox failure: {e}"}
+        protocol.write(json.dumps(response) + "\n")
+
+
+class SandboxWorker:
+    def __init__(self, limits: Dict):
+        self.limits = limits
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(limits)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        if not self.process.stdout.readline():
+            raise RuntimeError("sandbox worker failed to start")
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, code: str, timeout: float = None) -> Dict:
+        self.process.stdin.write(json.dumps({"code": code, "timeout": timeout}) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("sandbox worker exited")
+        return json.loads(line)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class SandboxPool:
+    # Pre-started worker interpreters, one snippet at a time each. Workers
+    # are handed out through a queue, so concurrent callers spread across
+    # them and block only when every worker is busy.
+    def __init__(self, size: int = None, limits: Dict = None, acquire_timeout: float = 60.0):
+        self.size = size or os.cpu_count() or 1
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.Queue()
+        self._closed = False
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            for worker in executor.map(lambda _: SandboxWorker(self.limits), range(self.size)):
+                self._idle.put(worker)
+        self.executed = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> SandboxWorker:
+        # A None slot stands for a worker that died and could not be
+        # restarted yet; it is started again here, on its next use.
+        worker = self._idle.get(timeout=self.acquire_timeout)
+        if worker is not None and worker.alive():
+            return worker
+        if worker is not None:
+            worker.close()
+        try:
+            worker = SandboxWorker(self.limits)
+        except Exception:
+            self._idle.put(None)
+            raise
+        with self._lock:
+            self.restarts += 1
+        return worker
+
+    def _release(self, worker: SandboxWorker):
+        # Always hands the slot back, so a failed restart never shrinks the pool.
+        if worker.alive():
+            self._idle.put(worker)
+            return
+        worker.close()
+        try:
+            worker = SandboxWorker(self.limits)
+        except Exception:
+            worker = None
+        else:
+            with self._lock:
+                self.restarts += 1
+        self._idle.put(worker)
+
+    def execute(self, code: str, timeout: float = None) -> Dict:
+        if self._closed:
+            return {"error": "Sandbox pool is closed"}
+        try:
+            worker = self._acquire()
+        except queue.Empty:
+            return {"error": f"No sandbox worker available after {self.acquire_timeout}s"}
+        except (RuntimeError, OSError) as e:
+            return {"error": f"Failed to start sandbox worker: {e}"}
+        try:
+            result = worker.run(code, timeout)
+        except (RuntimeError, OSError) as e:
+            result = {"error": f"Failed to execute code: {e}"}
+        finally:
+            self._release(worker)
+        with self._lock:
+            self.executed += 1
+        return result
+
+    def execute_batch(self, snippets: List[str], timeout: float = None) -> List[Dict]:
+        # Results come back in input order.
+        with ThreadPoolExecutor(max_workers=min(self.size, max(1, len(snippets))),
+                                thread_name_prefix="nexus-sandbox") as executor:
+            return list(executor.map(lambda code: self.execute(code, timeout), snippets))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"size": self.size, "executed": self.executed, "restarts": self.restarts}
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def sandbox_supported() -> bool:
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        return False
+    return hasattr(os, "fork") and hasattr(os, "killpg")
+
+
+def get_sandbox_pool() -> SandboxPool:
+    from config import SANDBOX
+
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool(SANDBOX["workers"], SANDBOX["limits"], SANDBOX["acquire_timeout"])
+        return _default_pool
+
+
+@atexit.register
+def close_sandbox_pool():
+    if _default_pool is not None:
+        _default_pool.close()
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        serve(json.loads(sys.argv[sys.argv.index("--worker") + 1]))
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List
+
+from state_manager import StateBackend, ProjectStateManager, check_page
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS projects_last_updated ON projects (last_updated);
+CREATE INDEX IF NOT EXISTS projects_name ON projects (name);
+
+-- Plans live apart from the project row: bumping last_updated must not
+-- rewrite a multi-megabyte plan.
+CREATE TABLE IF NOT EXISTS plans (
+    project_id TEXT PRIMARY KEY REFERENCES projects (id) ON DELETE CASCADE,
+    plan TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    task_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (project_id, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, project_id);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project_id, key)
+);
+"""
+
+SORT_COLUMNS = {"last_updated": "last_updated", "name": "name"}
+
+
+class SQLiteStateManager(StateBackend):
+    # One row per project, task and artifact, so a task transition is a
+    # single-row upsert. WAL mode lets readers run alongside the writer;
+    # each thread gets its own connection.
+    def __init__(self, db_path="projects/nexus_state.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(projects)")]
+        if "version" not in columns:
+            conn.execute("ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def save_project(self, project_id: str, state: Dict[str, Any]) -> bool:
+        return self.upsert_project(project_id, state)
+
+    def upsert_project(self, project_id: str, state: Dict[str, Any], last_updated: str = None) -> bool:
+        # save_project with an explicit last_updated, e.g. when importing
+        # projects that were saved elsewhere.
+        try:
+            plan = state.get("active_plan") or {}
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO projects (id, name, last_updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET name = excluded.name, last_updated = excluded.last_updated, "
+                    "version = projects.version + 1",
+                    (project_id, plan.get("project_name", "Unknown"), last_updated or datetime.now().isoformat())
+                )
+                conn.execute(
+                    "INSERT INTO plans (project_id, plan) VALUES (?, ?) "
+                    "ON CONFLICT (project_id) DO UPDATE SET plan = excluded.plan",
+                    (project_id, json.dumps(plan))
+                )
+                conn.execute("DELETE FROM tasks WHERE project_id = ?", (project_id,))
+                conn.execute("DELETE FROM artifacts WHERE project_id = ?", (project_id,))
+                conn.executemany(
+                    "INSERT INTO tasks (project_id, task_id, status, info) VALUES (?, ?, ?, ?)",
+                    [(project_id, str(task_id), info.get("status", "pending"), json.dumps(info))
+                     for task_id, info in (state.get("task_status") or {}).items()]
+                )
+                conn.executemany(
+                    "INSERT INTO artifacts (project_id, key, value) VALUES (?, ?, ?)",
+                    [(project_id, key, json.dumps(value))
+                     for key, value in (state.get("workspace_state") or {}).items()]
+                )
+            return True
+        except Exception as e:
+            print(f"Error saving project {project_id}: {e}")
+            return False
+
+    def append_events(self, project_id: str, events: List[Dict[str, Any]]) -> bool:
+        if not events:
+            return True
+        try:
+            with self._transaction() as conn:
+                for event in events:
+                    op = event.get("op")
+                    if op == "task_status":
+                        status = event["status"]
+                        conn.execute(
+                            "INSERT INTO tasks (project_id, task_id, status, info) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT (project_id, task_id) DO UPDATE SET status = excluded.status, "
+                            "info = excluded.info",
+                            (project_id, str(event["task_id"]), status.get("status", "pending"), json.dumps(status))
+                        )
+                    elif op == "workspace":
+                        conn.execute(
+                            "INSERT INTO artifacts (project_id, key, value) VALUES (?, ?, ?) "
+                            "ON CONFLICT (project_id, key) DO UPDATE SET value = excluded.value",
+                            (project_id, event["key"], json.dumps(event["value"]))
+                        )
+                conn.execute(
+                    "UPDATE projects SET last_updated = ?, version = version + 1 WHERE id = ?",
+                    (datetime.now().isoformat(), project_id)
+                )
+            return True
+        except Exception as e:
+            print(f"Error journaling project {project_id}: {e}")
+            return False
+
+    def load_project(self, project_id: str) -> Dict[str, Any]:
+        try:
+            conn = self._connection()
+            # A read transaction gives a consistent view across the tables.
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT plans.plan, projects.last_updated FROM projects "
+                    "JOIN plans ON plans.project_id = projects.id WHERE projects.id = ?", (project_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                tasks = conn.execute(
+                    "SELECT task_id, info FROM tasks WHERE project_id = ? ORDER BY rowid", (project_id,)
+                ).fetchall()
+                # Insertion order matters: the newest result is looked up last.
+                artifacts = conn.execute(
+                    "SELECT key, value FROM artifacts WHERE project_id = ? ORDER BY rowid", (project_id,)
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+
+            return {
+                "project_id": project_id,
+                "last_updated": row[1],
+                "state": {
+                    "active_plan": json.loads(row[0]),
+                    "workspace_state": {key: json.loads(value) for key, value in artifacts},
+                    "task_status": {task_id: json.loads(info) for task_id, info in tasks}
+                }
+            }
+        except Exception as e:
+            print(f"Error loading project {project_id}: {e}")
+            return None
+
+    def list_projects(self, offset: int = 0, limit: int = None, sort: str = "last_updated",
+                      descending: bool = True) -> List[Dict[str, Any]]:
+        check_page(offset, limit)
+        column = SORT_COLUMNS[sort]
+        direction = "DESC" if descending else "ASC"
+        rows = self._connection().execute(
+            f"SELECT id, last_updated, name FROM projects ORDER BY {column} {direction} LIMIT ? OFFSET ?",
+            (limit if limit is not None else -1, offset)
+        ).fetchall()
+        return [{"id": row[0], "last_updated": row[1], "name": row[2]} for row in rows]
+
+    def count_projects(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def projects_with_task_status(self, status: str) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT DISTINCT project_id FROM tasks WHERE status = ?", (status,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_version(self, project_id: str) -> str:
+        row = self._connection().execute(
+            "SELECT version FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()
+        return str(row[0]) if row else None
+
+    def delete_project(self, project_id: str) -> bool:
+        try:
+            with self._transaction() as conn:
+                cursor = conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error deleting project {project_id}: {e}")
+            return False
+
+
+def migrate_json_projects(storage_dir: str, db_path: str) -> int:
+    source = ProjectStateManager(storage_dir)
+    target = SQLiteStateManager(db_path)
+    migrated = 0
+    for file_name in sorted(os.listdir(storage_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        project_id = file_name[:-5]
+        project_data = source.load_project(project_id)
+        if not project_data:
+            print(f"Skipping unreadable project {project_id}")
+            continue
+        # Keep the original timestamp rather than the migration time.
+        if target.upsert_project(project_id, project_data["state"], project_data.get("last_updated")):
+            migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite project state maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="Copy JSON project files into a SQLite database")
+    migrate.add_argument("--from", dest="storage_dir", default="projects")
+    migrate.add_argument("--to", dest="db_path", default="projects/nexus_state.db")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_json_projects(args.storage_dir, args.db_path)
+        print(f"Migrated {count} projects into {args.db_path}")
@@ -1,59 +1,450 @@
+import argparse
 import json
+from abc import ABC, abstractmethod
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, List
+from config import STATE_BACKEND, STATE_DIR, STATE_DB_PATH
 
-class ProjectStateManager:
-    def __init__(self, storage_dir="projects"):
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def check_page(offset: int, limit: int):
+    if offset is None or offset < 0:
+        raise ValueError(f"offset must be a non-negative integer, got {offset}")
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be a non-negative integer, got {limit}")
+
+
+class StateBackend(ABC):
+    # Interface shared by the project state stores. load_project returns
+    # {"project_id", "last_updated", "state"} with task_status keyed by
+    # string task ids, whatever the backend.
+    @abstractmethod
+    def save_project(self, project_id: str, state: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def append_events(self, project_id: str, events: List[Dict[str, Any]]) -> bool:
+        ...
+
+    @abstractmethod
+    def load_project(self, project_id: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def list_projects(self, offset: int = 0, limit: int = None, sort: str = "last_updated",
+                      descending: bool = True) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def count_projects(self) -> int:
+        ...
+
+    @abstractmethod
+    def delete_project(self, project_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def projects_with_task_status(self, status: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_version(self, project_id: str) -> str:
+        # Opaque token that changes whenever the stored project changes;
+        # None if the project does not exist. Must not read project data.
+        ...
+
+    def record_task_status(self, project_id: str, task_id, status: Dict[str, Any]) -> bool:
+        return self.append_events(project_id, [{"op": "task_status", "task_id": task_id, "status": status}])
+
+    def record_workspace_entry(self, project_id: str, key: str, value: Any) -> bool:
+        return self.append_events(project_id, [{"op": "workspace", "key": key, "value": value}])
+
+
+class ProjectStateManager(StateBackend):
+    # Each project is a JSON snapshot (<id>.json) plus an append-only journal
+    # (<id>.journal) of small delta records. Task transitions only append to
+    # the journal; it is folded back into the snapshot in the background once
+    # it grows past the snapshot's own size, so compaction stays amortized O(1)
+    # per record.
+    #
+    # catalog.idx maps project ids to their name and last update so listing
+    # never has to open project files.
+    CATALOG_FILE = "catalog.idx"
+
+    def __init__(self, storage_dir="projects", compact_min_bytes=64 * 1024, catalog_flush_interval=5.0):
         self.storage_dir = storage_dir
+        self.compact_min_bytes = compact_min_bytes
+        self.catalog_flush_interval = catalog_flush_interval
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._compacting = set()
+        self._catalog = None
+        self._catalog_lock = threading.RLock()
+        # Catalog changes made here and not yet written: project id -> fields
+        # to set, or None for a deletion. They are re-applied on top of the
+        # file whenever it is re-read, and merged into it on write.
+        self._catalog_changes = {}
+        self._catalog_mtime = None
+        self._catalog_written_at = 0.0
         os.makedirs(storage_dir, exist_ok=True)
-    
+
+    def _catalog_path(self) -> str:
+        return os.path.join(self.storage_dir, self.CATALOG_FILE)
+
+    def _snapshot_path(self, project_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{project_id}.json")
+
+    def _journal_path(self, project_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{project_id}.journal")
+
+    def _compacting_path(self, project_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{project_id}.journal.compacting")
+
+    def _lock_for(self, project_id: str) -> threading.Lock:
+        with self._locks_guard:
+            if project_id not in self._locks:
+                self._locks[project_id] = threading.Lock()
+            return self._locks[project_id]
+
+    def _write_snapshot(self, project_id: str, data: Dict[str, Any]):
+        file_path = self._snapshot_path(project_id)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, file_path)
+
     def save_project(self, project_id: str, state: Dict[str, Any]) -> bool:
         try:
-            file_path = os.path.join(self.storage_dir, f"{project_id}.json")
-            with open(file_path, 'w') as f:
-                json.dump({
+            last_updated = datetime.now().isoformat()
+            with self._lock_for(project_id):
+                self._write_snapshot(project_id, {
                     "project_id": project_id,
-                    "last_updated": datetime.now().isoformat(),
+                    "last_updated": last_updated,
                     "state": state
-                }, f, indent=2)
+                })
+                # The snapshot now contains everything the journal described.
+                for path in (self._journal_path(project_id), self._compacting_path(project_id)):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._update_catalog(project_id, last_updated, self._project_name(state), force=True)
             return True
         except Exception as e:
             print(f"Error saving project {project_id}: {e}")
             return False
-    
+
+    def append_events(self, project_id: str, events: List[Dict[str, Any]]) -> bool:
+        if not events:
+            return True
+        try:
+            timestamp = datetime.now().isoformat()
+            lines = "".join(json.dumps(dict(event, ts=timestamp)) + "\n" for event in events)
+            with self._lock_for(project_id):
+                with open(self._journal_path(project_id), 'a') as f:
+                    f.write(lines)
+                    journal_size = f.tell()
+            self._update_catalog(project_id, timestamp)
+            self._maybe_compact(project_id, journal_size)
+            return True
+        except Exception as e:
+            print(f"Error journaling project {project_id}: {e}")
+            return False
+
+    @staticmethod
+    def _apply_event(project_data: Dict[str, Any], event: Dict[str, Any]):
+        state = project_data["state"]
+        op = event.get("op")
+        if op == "task_status":
+            # Match the string keys that task ids get after a JSON round-trip.
+            state.setdefault("task_status", {})[str(event["task_id"])] = event["status"]
+        elif op == "workspace":
+            state.setdefault("workspace_state", {})[event["key"]] = event["value"]
+        if event.get("ts"):
+            project_data["last_updated"] = event["ts"]
+
+    def _replay(self, project_data: Dict[str, Any], path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final record from an interrupted append.
+                    continue
+                self._apply_event(project_data, event)
+
+    def _read_project(self, project_id: str) -> Dict[str, Any]:
+        file_path = self._snapshot_path(project_id)
+        # The lock keeps a compaction from rotating the journal or swapping in
+        # a new snapshot between the three reads, which would drop records.
+        with self._lock_for(project_id):
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path, 'r') as f:
+                project_data = json.load(f)
+            # Records are idempotent assignments, so replaying a journal that a
+            # finished compaction already folded in is harmless.
+            self._replay(project_data, self._compacting_path(project_id))
+            self._replay(project_data, self._journal_path(project_id))
+        return project_data
+
     def load_project(self, project_id: str) -> Dict[str, Any]:
         try:
-            file_path = os.path.join(self.storage_dir, f"{project_id}.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    return json.load(f)
-            return None
+            return self._read_project(project_id)
         except Exception as e:
             print(f"Error loading project {project_id}: {e}")
             return None
-    
-    def list_projects(self) -> List[Dict[str, Any]]:
-        projects = []
+
+    def get_version(self, project_id: str) -> str:
+        parts = []
+        for path in (self._snapshot_path(project_id), self._compacting_path(project_id),
+                     self._journal_path(project_id)):
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+            except OSError:
+                if not parts:
+                    return None
+                parts.append("0")
+        return ":".join(parts)
+
+    def _maybe_compact(self, project_id: str, journal_size: int):
+        try:
+            snapshot_size = os.path.getsize(self._snapshot_path(project_id))
+        except OSError:
+            return
+        if journal_size < max(self.compact_min_bytes, snapshot_size):
+            return
+
+        with self._locks_guard:
+            if project_id in self._compacting:
+                return
+            self._compacting.add(project_id)
+
+        threading.Thread(
+            target=self._compact_in_background,
+            args=(project_id,),
+            name=f"compact-{project_id}",
+            daemon=True
+        ).start()
+
+    def _compact_in_background(self, project_id: str):
+        try:
+            self.compact_project(project_id)
+            self.flush_catalog()
+        finally:
+            with self._locks_guard:
+                self._compacting.discard(project_id)
+
+    def compact_project(self, project_id: str) -> bool:
+        journal_path = self._journal_path(project_id)
+        compacting_path = self._compacting_path(project_id)
+        try:
+            # Rotate the journal so appends continue into a fresh file while
+            # the snapshot is rebuilt outside the lock.
+            with self._lock_for(project_id):
+                if os.path.exists(journal_path) and not os.path.exists(compacting_path):
+                    os.replace(journal_path, compacting_path)
+                if not os.path.exists(compacting_path):
+                    return True
+
+            file_path = self._snapshot_path(project_id)
+            with open(file_path, 'r') as f:
+                project_data = json.load(f)
+            self._replay(project_data, compacting_path)
+
+            with self._lock_for(project_id):
+                # A full save_project in the meantime supersedes this compaction.
+                if os.path.exists(compacting_path):
+                    self._write_snapshot(project_id, project_data)
+                    os.remove(compacting_path)
+            return True
+        except Exception as e:
+            print(f"Error compacting project {project_id}: {e}")
+            return False
+
+    @staticmethod
+    def _project_name(state: Dict[str, Any]) -> str:
+        return ((state or {}).get("active_plan") or {}).get("project_name", "Unknown")
+
+    def _read_catalog_file(self) -> Dict[str, Dict[str, Any]]:
+        with open(self._catalog_path(), 'r') as f:
+            return json.load(f)
+
+    def _apply_catalog_changes(self, catalog: Dict[str, Dict[str, Any]]):
+        for project_id, change in self._catalog_changes.items():
+            if change is None:
+                catalog.pop(project_id, None)
+                continue
+            entry = catalog.setdefault(project_id, {"name": "Unknown"})
+            if (entry.get("last_updated") or "") > (change.get("last_updated") or ""):
+                # Another process saved this project more recently.
+                change = {key: value for key, value in change.items() if key != "last_updated"}
+            entry.update(change)
+
+    def _load_catalog(self) -> Dict[str, Dict[str, Any]]:
+        with self._catalog_lock:
+            path = self._catalog_path()
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+
+            if mtime is None:
+                if self._catalog is None:
+                    self.rebuild_catalog()
+                return self._catalog
+
+            # Pick up writes from other processes, keeping our unsaved changes
+            # on top of them.
+            if self._catalog is None or mtime != self._catalog_mtime:
+                try:
+                    catalog = self._read_catalog_file()
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Error reading project catalog, rebuilding: {e}")
+                    self.rebuild_catalog()
+                    return self._catalog
+                self._apply_catalog_changes(catalog)
+                self._catalog = catalog
+                self._catalog_mtime = mtime
+            return self._catalog
+
+    def _write_catalog(self, replace: bool = False):
+        # Re-reads the file under a lock file and merges our changes into it,
+        # so concurrent writers in other processes do not lose updates.
+        # replace=True writes the in-memory catalog as is (after a rebuild).
+        path = self._catalog_path()
+        with open(f"{path}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not replace:
+                    try:
+                        catalog = self._read_catalog_file()
+                    except (OSError, json.JSONDecodeError):
+                        catalog = dict(self._catalog or {})
+                    self._apply_catalog_changes(catalog)
+                    self._catalog = catalog
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._catalog, f)
+                os.replace(tmp_path, path)
+                self._catalog_mtime = os.path.getmtime(path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self._catalog_written_at = time.monotonic()
+        self._catalog_changes = {}
+
+    def flush_catalog(self):
+        with self._catalog_lock:
+            if self._catalog is not None and self._catalog_changes:
+                self._write_catalog()
+
+    def _update_catalog(self, project_id: str, last_updated: str, name: str = None, force: bool = False):
+        # Journal appends only bump last_updated; those are written out at
+        # most once per catalog_flush_interval to keep appends cheap.
+        with self._catalog_lock:
+            catalog = self._load_catalog()
+            change = {"last_updated": last_updated}
+            if name is not None:
+                change["name"] = name
+            entry = catalog.setdefault(project_id, {"name": "Unknown"})
+            entry.update(change)
+            pending = self._catalog_changes.get(project_id)
+            self._catalog_changes[project_id] = dict(pending, **change) if pending else change
+            if force or time.monotonic() - self._catalog_written_at >= self.catalog_flush_interval:
+                self._write_catalog()
+
+    def rebuild_catalog(self) -> int:
+        catalog = {}
         for file_name in os.listdir(self.storage_dir):
             if file_name.endswith('.json'):
                 project_id = file_name[:-5]
                 project_data = self.load_project(project_id)
                 if project_data:
-                    projects.append({
-                        "id": project_id,
-                        "last_updated": project_data.get("last_updated"),
-                        "name": project_data.get("state", {}).get("active_plan", {}).get("project_name", "Unknown")
-                    })
-        return projects
-    
+                    catalog[project_id] = {
+                        "name": self._project_name(project_data.get("state")),
+                        "last_updated": project_data.get("last_updated")
+                    }
+        with self._catalog_lock:
+            self._catalog = catalog
+            self._catalog_changes = {}
+            self._write_catalog(replace=True)
+        return len(catalog)
+
+    def list_projects(self, offset: int = 0, limit: int = None, sort: str = "last_updated",
+                      descending: bool = True) -> List[Dict[str, Any]]:
+        check_page(offset, limit)
+        with self._catalog_lock:
+            entries = [
+                {"id": project_id, "last_updated": entry.get("last_updated"), "name": entry.get("name", "Unknown")}
+                for project_id, entry in self._load_catalog().items()
+            ]
+        entries.sort(key=lambda entry: entry.get(sort) or "", reverse=descending)
+        end = offset + limit if limit is not None else None
+        return entries[offset:end]
+
+    def count_projects(self) -> int:
+        with self._catalog_lock:
+            return len(self._load_catalog())
+
+    def projects_with_task_status(self, status: str) -> List[str]:
+        # No index for task states in flat files; this reads every project.
+        matches = []
+        for project_id in list(self._load_catalog()):
+            project_data = self.load_project(project_id)
+            task_status = (project_data or {}).get("state", {}).get("task_status", {})
+            if any(info.get("status") == status for info in task_status.values()):
+                matches.append(project_id)
+        return matches
+
     def delete_project(self, project_id: str) -> bool:
         try:
-            file_path = os.path.join(self.storage_dir, f"{project_id}.json")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            with self._lock_for(project_id):
+                file_path = self._snapshot_path(project_id)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    for path in (self._journal_path(project_id), self._compacting_path(project_id)):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    deleted = True
+                else:
+                    deleted = False
+            with self._catalog_lock:
+                self._load_catalog().pop(project_id, None)
+                self._catalog_changes[project_id] = None
+                self._write_catalog()
+            return deleted
         except Exception as e:
             print(f"Error deleting project {project_id}: {e}")
             return False
+
+
+
+def create_state_manager(backend: str = None) -> StateBackend:
+    backend = backend or STATE_BACKEND
+    if backend == "sqlite":
+        from sqlite_state import SQLiteStateManager
+        return SQLiteStateManager(STATE_DB_PATH)
+    if backend == "json":
+        return ProjectStateManager(STATE_DIR)
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project state maintenance")
+    parser.add_argument("command", choices=["rebuild-catalog"])
+    parser.add_argument("--storage-dir", default="projects")
+    args = parser.parse_args()
+
+    if args.command == "rebuild-catalog":
+        count = ProjectStateManager(args.storage_dir).rebuild_catalog()
+        print(f"Catalog rebuilt with {count} projects")
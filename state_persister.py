@@ -0,0 +1,243 @@
+import atexit
+import threading
+import time
+import weakref
+from typing import Dict, Any, List
+
+from config import STATE_FLUSH_WINDOW
+
+
+class PersistenceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.saves = 0
+        self.failures = 0
+        self.events_recorded = 0
+        self.events_written = 0
+        self.events_dropped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record_events(self, count: int):
+        with self._lock:
+            self.events_recorded += count
+
+    def record_save(self, events: int, seconds: float, ok: bool):
+        with self._lock:
+            self.saves += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if ok:
+                self.events_written += events
+            else:
+                self.failures += 1
+
+    def record_dropped(self, events: int):
+        with self._lock:
+            self.events_dropped += events
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "saves": self.saves,
+                "failures": self.failures,
+                "events_recorded": self.events_recorded,
+                "events_written": self.events_written,
+                "events_dropped": self.events_dropped,
+                "total_seconds": round(self.total_seconds, 4),
+                "avg_seconds": round(self.total_seconds / self.saves, 4) if self.saves else 0.0,
+                "max_seconds": round(self.max_seconds, 4)
+            }
+
+
+class WriteBehindPersister:
+    # Task-path state changes are queued per project and written by a
+    # background flusher. Changes to the same task status or workspace entry
+    # within one window collapse into the latest record. A project whose
+    # writes keep failing is retried with backoff and its events are dropped
+    # (and logged) after max_attempts failed writes.
+    def __init__(self, state_manager, flush_window: float = None, max_attempts: int = 5,
+                 retry_backoff: float = 0.1, retry_backoff_max: float = 5.0):
+        self.state_manager = state_manager
+        self.flush_window = STATE_FLUSH_WINDOW if flush_window is None else flush_window
+        self.stats = PersistenceStats()
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self._pending = {}
+        self._failures = {}
+        self._retry_at = None
+        self._dirty_since = None
+        self._writing = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        _live_persisters.add(self)
+
+    @staticmethod
+    def _event_key(event: Dict[str, Any]):
+        if event.get("op") == "task_status":
+            return ("task_status", str(event["task_id"]))
+        if event.get("op") == "workspace":
+            return ("workspace", event["key"])
+        return (event.get("op"), id(event))
+
+    @staticmethod
+    def _merge(older: Dict, newer: Dict) -> Dict:
+        # Re-inserting moves a key to the end so the write order follows the
+        # order of the most recent changes.
+        merged = dict(older)
+        for key, event in newer.items():
+            merged.pop(key, None)
+            merged[key] = event
+        return merged
+
+    def record(self, project_id: str, events: List[Dict[str, Any]]):
+        self.stats.record_events(len(events))
+
+        if self.flush_window <= 0:
+            self._write(project_id, {self._event_key(event): event for event in events})
+            return
+
+        with self._cond:
+            queued = self._pending.setdefault(project_id, {})
+            for event in events:
+                key = self._event_key(event)
+                queued.pop(key, None)
+                queued[key] = event
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def save(self, project_id: str, state: Dict[str, Any]) -> bool:
+        # A full snapshot supersedes anything still queued for the project.
+        with self._cond:
+            self._pending.pop(project_id, None)
+            while self._writing:
+                self._cond.wait()
+            start = time.perf_counter()
+            ok = self.state_manager.save_project(project_id, state)
+        self.stats.record_save(0, time.perf_counter() - start, ok)
+        return ok
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="state-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+
+                # Coalesce until the window since the first unsaved change
+                # elapses, unless someone is waiting on flush(). A retry
+                # backoff applies either way, so a failing disk is not
+                # hammered in a loop.
+                while self._pending:
+                    ready_at = self._retry_at or 0
+                    if not (self._flush_requested or self._closed):
+                        ready_at = max(ready_at, (self._dirty_since or 0) + self.flush_window)
+                    remaining = ready_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending
+                self._pending = {}
+                self._dirty_since = None
+                self._retry_at = None
+                self._flush_requested = False
+                self._writing += 1
+
+            try:
+                for project_id, events in batch.items():
+                    try:
+                        ok = self._write(project_id, events)
+                    except Exception as e:
+                        print(f"[Nexus Prime] Failed to persist state for {project_id}: {e}")
+                        ok = False
+                    with self._cond:
+                        if ok:
+                            self._failures.pop(project_id, None)
+                        else:
+                            self._requeue(project_id, events)
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+
+    def _requeue(self, project_id: str, events: Dict):
+        # Called with the condition held after a failed write.
+        attempts = self._failures.get(project_id, 0) + 1
+        if attempts >= self.max_attempts:
+            self._failures.pop(project_id, None)
+            print(f"[Nexus Prime] Dropping {len(events)} unsaved state events for {project_id} "
+                  f"after {attempts} failed writes")
+            self.stats.record_dropped(len(events))
+            return
+        self._failures[project_id] = attempts
+        self._pending[project_id] = self._merge(events, self._pending.get(project_id, {}))
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        delay = min(self.retry_backoff * (2 ** (attempts - 1)), self.retry_backoff_max)
+        self._retry_at = max(self._retry_at or 0, time.monotonic() + delay)
+
+    def _write(self, project_id: str, events: Dict) -> bool:
+        records = list(events.values())
+        start = time.perf_counter()
+        ok = self.state_manager.append_events(project_id, records)
+        self.stats.record_save(len(records), time.perf_counter() - start, ok)
+        return ok
+
+    def flush(self, project_id: str = None, timeout: float = None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            def settled():
+                if project_id is not None:
+                    return project_id not in self._pending and not self._writing
+                return not self._pending and not self._writing
+
+            while not settled():
+                if self._thread is None or not self._thread.is_alive():
+                    if not self._pending:
+                        break
+                    self._ensure_thread()
+                self._flush_requested = True
+                self._cond.notify_all()
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        flushed = self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            if not flushed:
+                for project_id, events in self._pending.items():
+                    print(f"[Nexus Prime] Dropping {len(events)} unsaved state events for {project_id} "
+                          f"on shutdown")
+                    self.stats.record_dropped(len(events))
+                self._pending = {}
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        _live_persisters.discard(self)
+
+
+# One exit hook for every persister still alive; a weak set so persisters
+# can still be garbage-collected.
+_live_persisters = weakref.WeakSet()
+
+
+@atexit.register
+def close_persisters():
+    for persister in list(_live_persisters):
+        persister.close()
@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+# Meters charged for LLM calls made by the current thread/context, innermost
+# last (e.g. the task meter and its project's meter).
+_active_meters = ContextVar("nexus_usage_meters", default=())
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class UsageMeter:
+    # A running meter counts wall time since it was created; a stopped one
+    # (e.g. a project's) only accumulates the seconds added to it.
+    def __init__(self, calls: int = 0, tokens: int = 0, seconds: float = 0.0, running: bool = True):
+        self.calls = calls
+        self.tokens = tokens
+        self.seconds = seconds
+        self.started = time.monotonic() if running else None
+        self._lock = threading.Lock()
+
+    def add(self, calls: int = 0, tokens: int = 0, seconds: float = 0.0):
+        with self._lock:
+            self.calls += calls
+            self.tokens += tokens
+            self.seconds += seconds
+
+    @property
+    def elapsed(self) -> float:
+        running = time.monotonic() - self.started if self.started is not None else 0.0
+        return self.seconds + running
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"calls": self.calls, "tokens": self.tokens, "seconds": round(self.elapsed, 3)}
+
+
+class Budget:
+    # A limit of 0 or None means unlimited.
+    def __init__(self, max_calls: int = None, max_tokens: int = None, max_seconds: float = None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+
+    @classmethod
+    def from_config(cls, limits: Dict) -> "Budget":
+        return cls(limits.get("max_calls"), limits.get("max_tokens"), limits.get("max_seconds"))
+
+    def exceeded(self, meter: UsageMeter) -> str:
+        usage = meter.snapshot()
+        if self.max_calls and usage["calls"] >= self.max_calls:
+            return f"call budget of {self.max_calls} exhausted"
+        if self.max_tokens and usage["tokens"] >= self.max_tokens:
+            return f"token budget of {self.max_tokens} exhausted"
+        if self.max_seconds and usage["seconds"] >= self.max_seconds:
+            return f"time budget of {self.max_seconds}s exhausted"
+        return None
+
+
+@contextmanager
+def metering(*meters: UsageMeter):
+    token = _active_meters.set(_active_meters.get() + meters)
+    try:
+        yield
+    finally:
+        _active_meters.reset(token)
+
+
+def record_llm_usage(tokens: int):
+    for meter in _active_meters.get():
+        meter.add(calls=1, tokens=tokens)
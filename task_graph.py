@@ -0,0 +1,109 @@
+import heapq
+from typing import Dict, List
+
+
+class TaskGraph:
+    def __init__(self, plan: Dict, task_status: Dict):
+        self.task_status = task_status
+        self.tasks = {}
+        self.position = {}
+        self.dependents = {}
+        self.unmet = {}
+        self.counts = {'pending': 0, 'in_progress': 0, 'completed': 0, 'failed': 0}
+        self._ready = []
+
+        for phase in plan.get('phases', []):
+            for task in phase.get('tasks', []):
+                self.add_task(task)
+
+    @property
+    def total(self) -> int:
+        return len(self.tasks)
+
+    def add_task(self, task: Dict):
+        task_id = task['id']
+        if task_id in self.tasks:
+            return
+
+        # Project files round-trip through JSON, which turns integer task ids
+        # into string keys.
+        if task_id not in self.task_status and str(task_id) in self.task_status:
+            self.task_status[task_id] = self.task_status.pop(str(task_id))
+        if task_id not in self.task_status:
+            self.task_status[task_id] = {
+                'status': 'pending',
+                'dependencies': task.get('dependencies', []),
+                'dependencies_met': False
+            }
+
+        self.tasks[task_id] = task
+        self.position[task_id] = len(self.position)
+        status = self.task_status[task_id]['status']
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+        unmet = 0
+        for dep_id in task.get('dependencies', []):
+            self.dependents.setdefault(dep_id, []).append(task_id)
+            if self.status_of(dep_id) != 'completed':
+                unmet += 1
+        self.unmet[task_id] = unmet
+
+        if unmet == 0:
+            self.task_status[task_id]['dependencies_met'] = True
+            if status == 'pending':
+                heapq.heappush(self._ready, (self.position[task_id], task_id))
+
+    def status_of(self, task_id) -> str:
+        info = self.task_status.get(task_id)
+        if info is None:
+            info = self.task_status.get(str(task_id))
+        return info['status'] if info else None
+
+    def is_ready(self, task_id) -> bool:
+        return self.status_of(task_id) == 'pending' and self.unmet.get(task_id) == 0
+
+    def next_ready(self) -> Dict:
+        # Entries are not removed when a task leaves 'pending', so skip stale
+        # ones lazily here.
+        while self._ready:
+            task_id = self._ready[0][1]
+            if self.status_of(task_id) == 'pending':
+                return self.tasks[task_id]
+            heapq.heappop(self._ready)
+        return None
+
+    def ready_tasks(self) -> List[Dict]:
+        return [self.tasks[task_id] for _, task_id in sorted(self._ready) if self.is_ready(task_id)]
+
+    def set_status(self, task_id, status: str):
+        info = self.task_status[task_id]
+        previous = info['status']
+        if previous == status:
+            return
+
+        info['status'] = status
+        self.counts[previous] -= 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+        if status == 'pending' and self.unmet.get(task_id) == 0:
+            heapq.heappush(self._ready, (self.position[task_id], task_id))
+
+        if status == 'completed' or previous == 'completed':
+            delta = -1 if status == 'completed' else 1
+            for dependent_id in self.dependents.get(task_id, []):
+                if dependent_id not in self.tasks:
+                    continue
+                self.unmet[dependent_id] += delta
+                met = self.unmet[dependent_id] == 0
+                self.task_status[dependent_id]['dependencies_met'] = met
+                if met and self.status_of(dependent_id) == 'pending':
+                    heapq.heappush(self._ready, (self.position[dependent_id], dependent_id))
+
+    def progress(self) -> Dict:
+        return {
+            'completed': self.counts.get('completed', 0),
+            'failed': self.counts.get('failed', 0),
+            'in_progress': self.counts.get('in_progress', 0),
+            'pending': self.counts.get('pending', 0),
+            'total': self.total
+        }
@@ -0,0 +1,160 @@
+import ast
+import os
+from typing import Any, Callable, Dict, List
+
+from code_blocks import PYTHON_LANGUAGES, extract_code_blocks
+
+# Deterministic checks run on every task result before any retry is paid
+# for. A validator takes (result, task, workspace_dir) and returns a list of
+# issues; an empty list means the result passes. Register more with
+# @register_validator("AgentName").
+VALIDATORS: Dict[str, List[Callable]] = {}
+
+# Top-level keys each JSON-producing agent method is asked for, with the
+# container type expected for each.
+SCHEMAS = {
+    "design_algorithm": {"algorithm_name": str, "approach": str, "time_complexity": str,
+                         "space_complexity": str, "pseudocode": str, "data_structures": list,
+                         "edge_cases": list},
+    "design_architecture": {"architecture_type": str, "technology_stack": dict, "cloud_services": list,
+                            "key_components": list, "api_endpoints": list, "security_considerations": list},
+    "design_ui": {"design_system": dict, "screens": list, "components": list},
+    "develop_story": {"title": str, "premise": str, "genre": str, "characters": list, "plot": dict,
+                      "key_scenes": list, "themes": list},
+    "design_soundscape": {"soundscape_description": str, "ambient_sounds": list, "sound_effects": list,
+                          "music": dict, "mixing_guidelines": dict},
+    "compose_music_brief": {"composition_brief": str, "style": str, "tempo": str, "time_signature": str,
+                            "key": str, "instrumentation": list, "structure": dict, "emotional_arc": str},
+    "analyze_data": {"analysis_plan": str, "data_cleaning": list, "exploratory_analysis": list,
+                     "statistical_methods": list, "visualizations": list, "ml_approaches": list},
+    "design_ml_model": {"model_type": str, "architecture": str, "features": list, "training_approach": str,
+                        "evaluation_metrics": list, "challenges": list},
+    "design_smart_contract": {"contract_name": str, "platform": str, "functions": list,
+                              "security_considerations": list, "potential_vulnerabilities": list,
+                              "testing_approach": str},
+    "design_infrastructure": {"architecture": str, "services": list, "scaling_strategy": str,
+                              "security_measures": list, "cost_optimization": list},
+}
+
+AGENT_SCHEMAS = {
+    "LogicSphere": ["design_algorithm", "design_architecture"],
+    "PixelGenius": ["design_ui"],
+    "ScriptSensei": ["develop_story"],
+    "Aura": ["design_soundscape", "compose_music_brief"],
+    "DataScientist": ["analyze_data", "design_ml_model"],
+    "BlockchainDeveloper": ["design_smart_contract"],
+    "DevOpsEngineer": ["design_infrastructure"],
+}
+
+
+def register_validator(agent_name: str):
+    def decorator(validator: Callable) -> Callable:
+        VALIDATORS.setdefault(agent_name, []).append(validator)
+        return validator
+    return decorator
+
+
+def validate_result(result: Any, task: Dict, workspace_dir: str = "workspace") -> List[str]:
+    if isinstance(result, str):
+        return [] if result.strip() else ["Empty response"]
+    if not isinstance(result, dict):
+        return [f"Unexpected result type {type(result).__name__}"]
+    if 'error' in result:
+        return [f"Error occurred: {result['error']}"]
+
+    issues = []
+    for validator in VALIDATORS.get(task['agent'], []):
+        issues.extend(validator(result, task, workspace_dir))
+    return issues
+
+
+def schema_issues(result: Dict, schema: Dict[str, type]) -> List[str]:
+    issues = []
+    for key, expected in schema.items():
+        if key not in result or result[key] in (None, "", [], {}):
+            issues.append(f"missing '{key}'")
+        elif expected is not str and not isinstance(result[key], expected):
+            issues.append(f"'{key}' should be a {expected.__name__}")
+    return issues
+
+
+def python_syntax_issues(path: str, name: str) -> List[str]:
+    try:
+        with open(path, 'r') as f:
+            ast.parse(f.read(), filename=name)
+    except SyntaxError as e:
+        return [f"{name}: SyntaxError on line {e.lineno}: {e.msg}"]
+    except OSError as e:
+        return [f"{name}: could not be read ({e})"]
+    return []
+
+
+@register_validator("LogicSphere")
+@register_validator("PixelGenius")
+@register_validator("Aura")
+@register_validator("DataScientist")
+@register_validator("BlockchainDeveloper")
+@register_validator("DevOpsEngineer")
+def validate_schema(result: Dict, task: Dict, workspace_dir: str) -> List[str]:
+    # An agent with several methods passes if the result fits any of them.
+    # ScriptSensei is skipped here: only develop_story returns JSON, and its
+    # dict results are checked below.
+    best = None
+    for method in AGENT_SCHEMAS.get(task['agent'], []):
+        issues = schema_issues(result, SCHEMAS[method])
+        if not issues:
+            return []
+        if best is None or len(issues) < len(best[1]):
+            best = (method, issues)
+    if best is None:
+        return []
+    return [f"{best[0]} response does not match schema: {', '.join(best[1])}"]
+
+
+@register_validator("ScriptSensei")
+def validate_story(result: Dict, task: Dict, workspace_dir: str) -> List[str]:
+    issues = schema_issues(result, SCHEMAS["develop_story"])
+    return [f"develop_story response does not match schema: {', '.join(issues)}"] if issues else []
+
+
+@register_validator("PixelGenius")
+def validate_css(result: Dict, task: Dict, workspace_dir: str) -> List[str]:
+    css = result.get('css_code')
+    return [] if isinstance(css, str) and css.strip() else ["No CSS generated for the design"]
+
+
+@register_validator("CodeWeaver")
+def validate_code(result: Dict, task: Dict, workspace_dir: str) -> List[str]:
+    files = result.get('files') or []
+    if not extract_code_blocks(result.get('response') or "") or not files:
+        return ["No code blocks found in the response"]
+
+    # Only blocks fenced as Python are parsed; results without languages
+    # fall back to the file name.
+    languages = result.get('languages') or {}
+    issues = []
+    for name in files:
+        is_python = languages[name] in PYTHON_LANGUAGES if name in languages else name.endswith('.py')
+        if is_python:
+            issues.extend(python_syntax_issues(os.path.join(workspace_dir, name), name))
+    return issues
+
+
+@register_validator("Q-Arc")
+def validate_quality(result: Dict, task: Dict, workspace_dir: str) -> List[str]:
+    issues = []
+    if 'test_file' in result:
+        issues.extend(python_syntax_issues(os.path.join(workspace_dir, result['test_file']), result['test_file']))
+
+    test_results = result.get('test_results')
+    if isinstance(test_results, dict):
+        if 'error' in test_results:
+            issues.append(f"Test run failed: {test_results['error']}")
+        elif test_results.get('status') == 'FAIL':
+            failures = test_results.get('failures') or []
+            issues.append(f"Tests failed: {', '.join(failures)}" if failures else "Tests failed")
+
+    # A review's verdict is about the code under review, which a retry of the
+    # review does not change; it stays in the result as verdict and
+    # blocking_issues instead of failing validation.
+    return issues
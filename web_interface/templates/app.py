@@ -1,12 +1,46 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, abort, render_template, request, jsonify, send_from_directory, stream_with_context, url_for
+import json
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from nexus_core import NexusCore
+from project_cache import ProjectCache, make_etag
+from session_manager import SessionManager
+from job_queue import JobQueue
+from events import get_event_bus
 
 app = Flask(__name__)
 nexus = NexusCore()
+sessions = SessionManager(nexus)
+project_cache = ProjectCache(nexus.state_manager)
+event_bus = get_event_bus()
+
+
+def publish_job_update(job):
+    data = job.to_dict()
+    data.pop('result', None)
+    event_bus.publish(job.project_id, 'job', data)
+
+job_queue = JobQueue(on_update=publish_job_update)
+
+
+def cached_response(project_id, representation, render):
+    version = project_cache.version(project_id)
+    if version is None:
+        return jsonify({"error": "Project not found"}), 404
+
+    etag = make_etag(project_id, version, representation)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        entry = project_cache.get(project_id, version)
+        if entry is None:
+            return jsonify({"error": "Project not found"}), 404
+        response = jsonify(render(entry))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/')
 def index():
@@ -15,38 +49,113 @@ def index():
 @app.route('/api/projects', methods=['GET', 'POST'])
 def handle_projects():
     if request.method == 'GET':
-        projects = nexus.state_manager.list_projects()
-        return jsonify(projects)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        sort = request.args.get('sort', 'last_updated')
+        if sort not in ('last_updated', 'name'):
+            return jsonify({"error": f"Unsupported sort field: {sort}"}), 400
+        descending = request.args.get('order', 'desc') != 'asc'
+        try:
+            projects = nexus.state_manager.list_projects(offset=offset, limit=limit, sort=sort, descending=descending)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        response = jsonify(projects)
+        response.headers['X-Total-Count'] = str(nexus.state_manager.count_projects())
+        return response
     else:
         data = request.json
-        project_id = nexus.create_project(data['command'])
-        return jsonify({"project_id": project_id})
+        session = sessions.create(data['command'])
+        return jsonify({"project_id": session.project_id if session else None})
 
 @app.route('/api/projects/<project_id>', methods=['GET', 'PUT', 'DELETE'])
 def handle_project(project_id):
     if request.method == 'GET':
-        if nexus.load_project(project_id):
-            status = nexus.get_project_status()
-            return jsonify(status)
-        return jsonify({"error": "Project not found"}), 404
+        return cached_response(project_id, 'status', lambda entry: entry.status)
         
     elif request.method == 'PUT':
-        result = nexus.execute_next_task()
-        return jsonify(result)
+        if project_cache.version(project_id) is None:
+            return jsonify({"error": "Project not found"}), 404
+        job = job_queue.submit(project_id, 'execute_next_task', execute_next_task_job)
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": url_for('handle_job', job_id=job.id)
+        }), 202
         
     elif request.method == 'DELETE':
         success = nexus.state_manager.delete_project(project_id)
+        sessions.discard(project_id)
+        project_cache.invalidate(project_id)
+        event_bus.forget(project_id)
         return jsonify({"success": success})
 
+def execute_next_task_job(job):
+    with sessions.checkout(job.project_id) as session:
+        if session is None:
+            return {"error": "Project not found"}
+        job.check_cancelled()
+        task = session.claim_next_task()
+
+    if task is None:
+        return {"message": "No tasks available for execution"}
+    result = session.run_task(task)
+    session.flush()
+    return result
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def handle_job(job_id):
+    if request.method == 'GET':
+        job = job_queue.get(job_id)
+    else:
+        job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/projects/<project_id>/jobs')
+def list_project_jobs(project_id):
+    return jsonify([job.to_dict() for job in job_queue.list(project_id)])
+
+@app.route('/api/projects/<project_id>/events')
+def project_events(project_id):
+    if project_cache.version(project_id) is None:
+        return jsonify({"error": "Project not found"}), 404
+
+    # Browsers resend the last id they saw when EventSource reconnects.
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = event_bus.subscribe(project_id, last_event_id)
+
+    def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscription.get(timeout=15)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/projects/<project_id>/artifacts')
 def get_project_artifacts(project_id):
-    if nexus.load_project(project_id):
-        return jsonify(nexus.workspace_state)
-    return jsonify({"error": "Project not found"}), 404
+    return cached_response(project_id, 'artifacts', lambda entry: entry.workspace_state)
 
-@app.route('/workspace/<path:filename>')
-def serve_workspace_file(filename):
-    return send_from_directory('../workspace', filename)
+@app.route('/workspace/<project_id>/<path:filename>')
+def serve_workspace_file(project_id, filename):
+    try:
+        workspace_dir = nexus.artifacts.workspace_path(project_id)
+    except ValueError:
+        abort(404)
+    if not os.path.isdir(workspace_dir):
+        abort(404)
+    return send_from_directory(os.path.abspath(workspace_dir), filename)
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=True, port=5000, threaded=True)
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List
+
+from config import JOB_WORKERS
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, project_id: str, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.project_id = project_id
+        self.kind = kind
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "project_id": self.project_id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_event.is_set(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobQueue:
+    # Runs long task executions off the request thread. Jobs are cancelled
+    # outright while queued; a running job only stops at its next
+    # check_cancelled() call, since an LLM round-trip cannot be interrupted.
+    def __init__(self, max_workers: int = None, max_finished: int = 1000,
+                 on_update: Callable[[Job], None] = None):
+        self.max_finished = max_finished
+        self.on_update = on_update
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or JOB_WORKERS, thread_name_prefix="nexus-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, project_id: str, kind: str, fn: Callable[[Job], Any]) -> Job:
+        job = Job(project_id, kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._notify(job)
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _notify(self, job: Job):
+        if self.on_update is not None:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"[Nexus Prime] Job update hook failed: {e}")
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        with self._lock:
+            if job.status != 'queued':
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+        self._notify(job)
+
+        try:
+            job.check_cancelled()
+            result = fn(job)
+            status, error = 'succeeded', None
+            if isinstance(result, dict) and 'error' in result:
+                status, error = 'failed', result['error']
+        except JobCancelled as e:
+            result, status, error = None, 'cancelled', str(e)
+        except Exception as e:
+            print(f"[Nexus Prime] Job {job.id} failed: {e}")
+            result, status, error = None, 'failed', str(e)
+
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+        self._notify(job)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in ('succeeded', 'failed', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, project_id: str = None) -> List[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if project_id is None or job.project_id == project_id]
+
+    def cancel(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_event.set()
+            if job.status == 'queued' and job.future is not None and job.future.cancel():
+                job.status = 'cancelled'
+                job.error = f"Job {job.id} was cancelled"
+                job.finished_at = time.time()
+        self._notify(job)
+        return job
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+from nexus_core import summarize_progress
+from task_graph import TaskGraph
+
+
+class CachedProject:
+    def __init__(self, project_id: str, version: str, project_data: Dict[str, Any]):
+        self.project_id = project_id
+        self.version = version
+        self.project_data = project_data
+        self._status = None
+
+    @property
+    def workspace_state(self) -> Dict[str, Any]:
+        return self.project_data['state']['workspace_state']
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        if self._status is None:
+            state = self.project_data['state']
+            graph = TaskGraph(state['active_plan'], state['task_status'])
+            self._status = summarize_progress(state['active_plan'], graph)
+        return self._status
+
+
+def make_etag(project_id: str, version: str, representation: str) -> str:
+    digest = hashlib.sha1(f"{project_id}:{version}".encode("utf-8")).hexdigest()[:16]
+    return f"{representation}-{digest}"
+
+
+class ProjectCache:
+    # Bounded LRU of parsed project states. Entries are validated against
+    # the backend's version token (a stat or a single-row lookup) on every
+    # access, so an unchanged project costs neither a read nor a parse.
+    def __init__(self, state_manager, max_entries: int = 128):
+        self.state_manager = state_manager
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, project_id: str) -> str:
+        return self.state_manager.get_version(project_id)
+
+    def get(self, project_id: str, version: str = None) -> CachedProject:
+        if version is None:
+            version = self.version(project_id)
+        if version is None:
+            self.invalidate(project_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(project_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # If a write lands between reading the version and loading, the
+        # entry is tagged with the older version and reloaded next time.
+        project_data = self.state_manager.load_project(project_id)
+        if project_data is None:
+            self.invalidate(project_id)
+            return None
+
+        entry = CachedProject(project_id, version, project_data)
+        with self._lock:
+            self._entries[project_id] = entry
+            self._entries.move_to_end(project_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, project_id: str):
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
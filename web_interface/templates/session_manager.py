@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from nexus_core import NexusCore, ProjectSession
+
+
+class SessionManager:
+    # Hands out one ProjectSession per project to concurrent requests.
+    # Sessions with tasks in flight are shared so their in-memory state stays
+    # authoritative; idle ones are reopened from storage on each checkout so
+    # writes made by other worker processes are picked up.
+    def __init__(self, engine: NexusCore, max_idle_sessions: int = 64):
+        self.engine = engine
+        self.max_idle_sessions = max_idle_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # project_id -> [lock, number of callers holding or waiting on it];
+        # entries are dropped when the last caller leaves.
+        self._project_locks = {}
+
+    @contextmanager
+    def _project_lock(self, project_id: str):
+        with self._lock:
+            entry = self._project_locks.get(project_id)
+            if entry is None:
+                entry = self._project_locks[project_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._project_locks[project_id]
+
+    def create(self, user_command: str) -> ProjectSession:
+        session = self.engine.create_session(user_command)
+        if session is not None:
+            self._store(session)
+        return session
+
+    @contextmanager
+    def checkout(self, project_id: str):
+        # The project lock is held for the whole block, so a caller that
+        # claims a task inside it marks the session busy before anyone else
+        # can decide to reopen it.
+        with self._project_lock(project_id):
+            yield self._get_locked(project_id)
+
+    def get(self, project_id: str) -> ProjectSession:
+        with self.checkout(project_id) as session:
+            return session
+
+    def _get_locked(self, project_id: str) -> ProjectSession:
+        with self._lock:
+            session = self._sessions.get(project_id)
+            if session is not None and session.is_busy():
+                self._sessions.move_to_end(project_id)
+                return session
+
+        session = self.engine.open_session(project_id)
+        if session is None:
+            self.discard(project_id)
+            return None
+        self._store(session)
+        return session
+
+    def _store(self, session: ProjectSession):
+        with self._lock:
+            self._sessions[session.project_id] = session
+            self._sessions.move_to_end(session.project_id)
+            idle = [project_id for project_id, stored in self._sessions.items() if not stored.is_busy()]
+            for project_id in idle[:max(0, len(self._sessions) - self.max_idle_sessions)]:
+                del self._sessions[project_id]
+
+    def discard(self, project_id: str):
+        with self._lock:
+            self._sessions.pop(project_id, None)
+
+    def active_sessions(self):
+        with self._lock:
+            return list(self._sessions)